@@ -0,0 +1,53 @@
+from collections import defaultdict
+
+from core.utils import chunked
+from reviews.models import Category, Genre, TitleGenre
+
+EXPORT_VALUES = ('id', 'name', 'year', 'description', 'category_id', 'rating')
+
+
+def load_missing(model, cache, ids):
+    """Дополняет словарь {pk: {name, slug}} недостающими объектами."""
+    missing = [pk for pk in ids if pk is not None and pk not in cache]
+    if missing:
+        cache.update(
+            (pk, {'name': name, 'slug': slug})
+            for pk, name, slug in model.objects.filter(
+                pk__in=missing).values_list('pk', 'name', 'slug')
+        )
+
+
+def title_batches(queryset, chunk_size):
+    """Порции произведений для выгрузки в формате TitleSerializerGet.
+
+    Произведения читаются курсором на стороне сервера, а жанры и
+    категории подгружаются одним запросом на порцию. В памяти держится
+    только текущая порция и справочники жанров и категорий.
+    """
+    genres, categories = {}, {}
+    rows = queryset.values(*EXPORT_VALUES).iterator(chunk_size=chunk_size)
+    for batch in chunked(rows, chunk_size):
+        title_genres = defaultdict(list)
+        # Связи с удалённым жанром остаются с genre_id = NULL.
+        for title_id, genre_id in TitleGenre.objects.filter(
+            title_id__in=[row['id'] for row in batch],
+            genre_id__isnull=False,
+        ).order_by('genre_id').values_list('title_id', 'genre_id'):
+            title_genres[title_id].append(genre_id)
+        load_missing(Genre, genres, {
+            genre_id for ids in title_genres.values() for genre_id in ids})
+        load_missing(
+            Category, categories, {row['category_id'] for row in batch})
+        yield [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'description': row['description'],
+                'genre': [
+                    genres[genre_id] for genre_id in title_genres[row['id']]],
+                'category': categories.get(row['category_id']),
+                'rating': row['rating'],
+            }
+            for row in batch
+        ]
@@ -1,13 +1,45 @@
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
 from django_filters.rest_framework import CharFilter, FilterSet, NumberFilter
-from reviews.models import Title
+from reviews.models import Title, TitleGenre
 
 
 class TitleFilter(FilterSet):
+    # На Postgres icontains по названию обслуживается GIN-индексом pg_trgm.
     name = CharFilter(field_name='name', lookup_expr='icontains')
-    year = NumberFilter(field_name='year', lookup_expr='icontains')
-    category = CharFilter(field_name='category__slug', lookup_expr='icontains')
-    genre = CharFilter(field_name='genre__slug', lookup_expr='icontains')
+    year = NumberFilter(field_name='year')
+    category = CharFilter(field_name='category__slug')
+    genre = CharFilter(method='filter_genre')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('name', 'category', 'genre', 'year')
+        fields = ('name', 'category', 'genre', 'year', 'search')
+
+    def filter_genre(self, queryset, name, value):
+        # Полусоединение вместо JOIN не размножает строки произведений.
+        return queryset.filter(id__in=TitleGenre.objects.filter(
+            genre__slug=value).values('title_id'))
+
+    def filter_search(self, queryset, name, value):
+        if connections[queryset.db].vendor == 'postgresql':
+            return self.search_postgresql(queryset, value)
+        return self.search_fallback(queryset, value)
+
+    def search_postgresql(self, queryset, value):
+        from django.contrib.postgres.search import TrigramSimilarity
+        return queryset.filter(
+            Q(name__icontains=value) | Q(name__trigram_similar=value)
+        ).annotate(
+            relevance=TrigramSimilarity('name', value)
+        ).order_by('-relevance', 'id')
+
+    def search_fallback(self, queryset, value):
+        return queryset.filter(name__icontains=value).annotate(
+            relevance=Case(
+                When(name__iexact=value, then=Value(2)),
+                When(name__istartswith=value, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ).order_by('-relevance', 'id')
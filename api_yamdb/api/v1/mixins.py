@@ -0,0 +1,42 @@
+from core.conditional import ConditionalGetMixin
+from django.shortcuts import get_object_or_404
+from reviews.models import Title
+
+
+class TitleVersionMixin(ConditionalGetMixin):
+    """Валидаторы по версии произведения.
+
+    Версия растёт при любом изменении произведения, его жанров, категории,
+    отзывов и комментариев, поэтому её достаточно и для вложенных ресурсов.
+    """
+
+    title_url_kwarg = 'title_id'
+
+    def get_title_stamp(self):
+        if not hasattr(self, '_title_stamp'):
+            self._title_stamp = Title.objects.filter(
+                pk=self.kwargs.get(self.title_url_kwarg)
+            ).values_list('version', 'modified').first()
+        return self._title_stamp
+
+    def get_version_stamp(self):
+        return self.get_title_stamp()
+
+    def get_last_modified(self):
+        stamp = self.get_title_stamp()
+        return stamp and stamp[1]
+
+
+class ResolvedParentMixin:
+    """Родительские объекты из URL, найденные один раз за запрос.
+
+    Экземпляр представления живёт один запрос, поэтому кэш на нём
+    разделяют get_queryset, perform_create и сериализатор через
+    context['view'].
+    """
+
+    def get_parent(self, name, queryset, **lookup):
+        parents = self.__dict__.setdefault('_resolved_parents', {})
+        if name not in parents:
+            parents[name] = get_object_or_404(queryset, **lookup)
+        return parents[name]
@@ -0,0 +1,45 @@
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       LimitOffsetPagination)
+
+
+class FeedCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class FeedPagination(BasePagination):
+    """Пагинация лент отзывов и комментариев.
+
+    Запрос с параметром cursor (первая страница — ?cursor=) обслуживается
+    по ключу (pub_date, id) и стоит одинаково на любой глубине. Остальные
+    запросы, в том числе с limit/offset, работают как раньше.
+    """
+
+    def __init__(self):
+        self.cursor_paginator = FeedCursorPagination()
+        self.limit_offset_paginator = LimitOffsetPagination()
+        self.paginator = self.limit_offset_paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_paginator.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_paginator
+        else:
+            self.paginator = self.limit_offset_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.limit_offset_paginator.get_paginated_response_schema(
+            schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = (
+            self.limit_offset_paginator.get_schema_operation_parameters(view))
+        return parameters + [
+            parameter for parameter
+            in self.cursor_paginator.get_schema_operation_parameters(view)
+            if parameter['name'] == self.cursor_paginator.cursor_query_param
+        ]
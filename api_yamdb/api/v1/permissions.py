@@ -18,7 +18,7 @@ class IsAuthorAndStaffOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
             or request.user.is_moderator
             or request.user.is_admin
         )
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPORT_FIELDS = (
+    'id', 'name', 'year', 'description', 'genre', 'category', 'rating')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    orjson пишет UTF-8 без экранирования кириллицы и сам сериализует
+    datetime, date, UUID и вложенные dict и list; Decimal, ленивые строки
+    и остальное отдаётся JSONEncoder из DRF. Без orjson, а также для
+    ответов с отступами (indent в Accept, Browsable API) и при
+    UNICODE_JSON или COMPACT_JSON, выключенных в настройках DRF, работает
+    обычный JSONRenderer.
+    """
+    # Даты с UTC пишутся с Z, как в JSONEncoder; ключи-числа — строками,
+    # как в json.dumps.
+    options = (
+        orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(
+                    accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        rendered = orjson.dumps(
+            data, default=JSONEncoder().default, option=self.options)
+        # Как и JSONRenderer, экранируем U+2028 и U+2029 для JavaScript.
+        if b'\xe2\x80\xa8' not in rendered and b'\xe2\x80\xa9' not in rendered:
+            return rendered
+        return rendered.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ExportRenderer(BaseRenderer):
+    """Построчная выгрузка для StreamingHttpResponse.
+
+    render нужен только для ответов с ошибками, сами данные отдаёт
+    генератор stream подклассов по одной строке текста на порцию
+    произведений.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, batches):
+        for rows in batches:
+            yield ''.join(
+                json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, batches):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for rows in batches:
+            writer.writerows(map(self.flatten, rows))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Пустая выгрузка: только заголовок.
+            yield buffer.getvalue()
+
+    @staticmethod
+    def flatten(row):
+        row = dict(row)
+        row['genre'] = ','.join(genre['slug'] for genre in row['genre'])
+        row['category'] = row['category']['slug'] if row['category'] else ''
+        return [row[field] for field in EXPORT_FIELDS]
@@ -1,15 +1,18 @@
+from core.cache import catalog_cache
+from core.metrics import MeasuredSerializerMixin
 from core.utils import username_is_valid
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
+from django.db import connection, transaction
 from django.utils import timezone
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = [
             'first_name',
@@ -28,7 +31,8 @@ class UserSerializer(serializers.ModelSerializer):
         return data
 
 
-class SendEmailSerializer(serializers.ModelSerializer):
+class SendEmailSerializer(MeasuredSerializerMixin,
+                          serializers.ModelSerializer):
     email = serializers.EmailField(max_length=254, required=True)
     username = serializers.CharField(max_length=150, required=True)
 
@@ -55,7 +59,7 @@ class SendEmailSerializer(serializers.ModelSerializer):
         return data
 
 
-class TokenSerializer(serializers.ModelSerializer):
+class TokenSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField()
     confirmation_code = serializers.CharField()
 
@@ -64,21 +68,21 @@ class TokenSerializer(serializers.ModelSerializer):
         fields = ('username', 'confirmation_code',)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Category
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Genre
         lookup_field = 'slug'
 
 
-class TitleSerializerGet(serializers.ModelSerializer):
+class TitleSerializerGet(MeasuredSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
@@ -89,7 +93,7 @@ class TitleSerializerGet(serializers.ModelSerializer):
         model = Title
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     name = serializers.CharField(max_length=256)
     category = serializers.SlugRelatedField(
         queryset=Category.objects.all(),
@@ -110,7 +114,89 @@ class TitleSerializer(serializers.ModelSerializer):
         return value
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Пакетное создание произведений.
+
+    Слаги категорий и жанров всех произведений проверяются одним
+    запросом на таблицу, ошибки возвращаются списком по произведениям.
+    """
+    max_items = 100
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > self.max_items:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Не больше {self.max_items} произведений за запрос']
+            })
+        items = super().to_internal_value(data)
+        categories = Category.objects.in_bulk(
+            {item['category'] for item in items}, field_name='slug')
+        genres = Genre.objects.in_bulk(
+            {slug for item in items for slug in item['genre']},
+            field_name='slug')
+        errors = [
+            self.missing_slugs(item, categories, genres) for item in items]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return [
+            {
+                **item,
+                'category': categories[item['category']],
+                'genre': [genres[slug] for slug in dict.fromkeys(
+                    item['genre'])],
+            }
+            for item in items
+        ]
+
+    @staticmethod
+    def missing_slugs(item, categories, genres):
+        message = serializers.SlugRelatedField.default_error_messages[
+            'does_not_exist']
+        errors = {}
+        if item['category'] not in categories:
+            errors['category'] = [
+                message.format(slug_name='slug', value=item['category'])]
+        missing = [slug for slug in item['genre'] if slug not in genres]
+        if missing:
+            errors['genre'] = [
+                message.format(slug_name='slug', value=slug)
+                for slug in missing
+            ]
+        return errors
+
+    @transaction.atomic
+    def create(self, validated_data):
+        titles = [
+            Title(**{
+                field: value for field, value in item.items()
+                if field != 'genre'
+            })
+            for item in validated_data
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        else:
+            # Без RETURNING bulk_create не проставляет id.
+            for title in titles:
+                title.save()
+        TitleGenre.objects.bulk_create([
+            TitleGenre(title=title, genre=genre)
+            for title, item in zip(titles, validated_data)
+            for genre in item['genre']
+        ])
+        catalog_cache.bump_on_commit('titles')
+        return titles
+
+
+class TitleBulkSerializer(TitleSerializer):
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta(TitleSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
+
+
+class ReviewSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     title = serializers.SlugRelatedField(
         slug_field='name',
         read_only=True
@@ -124,20 +210,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if (
-                request.method == 'POST'
-                and Review.objects.filter(title=title, author=author).exists()
-        ):
-            raise ValidationError('Вы уже оставили отзыв на это произведение')
-        return data
-
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     review = serializers.SlugRelatedField(
         slug_field='text',
         read_only=True
@@ -1,23 +1,33 @@
+from core.cache import CachedResponseMixin
+from core.routing import ReplicaReadMixin
 from core.utils import CreateListDestroyViewsSet, email_msg
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.settings import api_settings
 from reviews.models import Category, Genre, Review, Title, User
+from users.authentication import issue_access_token, model_user
 
+from .export import title_batches
 from .filters import TitleFilter
+from .mixins import ResolvedParentMixin, TitleVersionMixin
+from .pagination import FeedPagination
 from .permissions import (IsAdminOrReadOnlyPermission, IsAdminUser,
                           IsAuthorAndStaffOrReadOnly)
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer,
-                          SendEmailSerializer, TitleSerializer,
-                          TitleSerializerGet, TokenSerializer, UserSerializer)
+                          SendEmailSerializer, TitleBulkSerializer,
+                          TitleSerializer, TitleSerializerGet, TokenSerializer,
+                          UserSerializer)
 
 
 @api_view(['POST'])
@@ -32,7 +42,7 @@ def get_token(request):
     if (user.confirmation_code == serializer.validated_data.get(
             'confirmation_code')):
         return Response(
-            {'token': str(AccessToken.for_user(user))},
+            {'token': str(issue_access_token(user))},
             status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -67,19 +77,23 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def me(self, request):
+        # В токене только роль, профиль целиком берётся из БД.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            serializer = UserSerializer(request.user)
+            serializer = UserSerializer(user)
             return Response(serializer.data)
 
         serializer = UserSerializer(
-            request.user, data=request.data, partial=True,
+            user, data=request.data, partial=True,
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=request.user.role)
+        serializer.save(role=user.role)
         return Response(serializer.data)
 
 
-class CategoryViewSet(CreateListDestroyViewsSet):
+class CategoryViewSet(ReplicaReadMixin, CachedResponseMixin,
+                      CreateListDestroyViewsSet):
+    cache_namespaces = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnlyPermission,)
@@ -88,7 +102,9 @@ class CategoryViewSet(CreateListDestroyViewsSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateListDestroyViewsSet):
+class GenreViewSet(ReplicaReadMixin, CachedResponseMixin,
+                   CreateListDestroyViewsSet):
+    cache_namespaces = ('genres',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnlyPermission,)
@@ -97,57 +113,121 @@ class GenreViewSet(CreateListDestroyViewsSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadMixin, TitleVersionMixin, CachedResponseMixin,
+                   viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
-    queryset = Title.objects.all()
     permission_classes = (IsAdminOrReadOnlyPermission,)
-    serializer_class = TitleSerializer
     filterset_class = TitleFilter
-    filter_backends = (DjangoFilterBackend,)
-
-    def list(self, request):
-        queryset = self.filter_queryset(Title.objects.annotate(
-            rating=Avg('reviews__score')))
-        serializer = TitleSerializerGet(queryset, many=True)
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            return self.get_paginated_response(serializer.data)
-        return Response(serializer.data)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    ordering_fields = ('name', 'year', 'rating')
+    cache_anonymous_only = True
+    title_url_kwarg = 'pk'
+    export_chunk_size = 2000
 
-    def retrieve(self, request, pk=None):
-        queryset = Title.objects.annotate(rating=Avg('reviews__score'))
-        user = get_object_or_404(queryset, pk=pk)
-        serializer = TitleSerializerGet(user)
-        return Response(serializer.data)
+    def get_queryset(self):
+        # Жанры и категория подгружаются только для объектов страницы:
+        # пагинация срезает queryset до выполнения prefetch_related.
+        return Title.objects.select_related(
+            'category').prefetch_related('genre')
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve'):
+            return TitleSerializerGet
+        return TitleSerializer
+
+    def get_title_stamp(self):
+        if self.action != 'retrieve':
+            return None
+        return super().get_title_stamp()
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return ('categories', 'genres', f'title:{self.kwargs["pk"]}')
+        return ('titles',)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = TitleBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        queryset = self.get_queryset().filter(
+            pk__in=[title.pk for title in titles]).order_by('pk')
+        return Response(
+            TitleSerializer(queryset, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
 
+    @action(
+        detail=False,
+        permission_classes=(IsAdminUser,),
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+    )
+    def export(self, request):
+        # Формат выбирается по Accept или ?format=ndjson|csv.
+        queryset = self.filter_queryset(Title.objects.order_by('pk'))
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(title_batches(queryset, self.export_chunk_size)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="titles.{renderer.format}"')
+        return response
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ReplicaReadMixin, ResolvedParentMixin,
+                    TitleVersionMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthorAndStaffOrReadOnly, ]
+    pagination_class = FeedPagination
 
     def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        return self.get_parent(
+            'title', Title, id=self.kwargs.get('title_id'))
+
+    def get_title_stamp(self):
+        title = self.get_title()
+        return title.version, title.modified
 
     def get_queryset(self):
-        return Review.objects.filter(title=self.get_title().id)
+        # Отзывы привязываются к уже загруженному произведению.
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        # Повторный отзыв отсекает ограничение unique review, без
+        # отдельного запроса exists().
+        try:
+            serializer.save(
+                author=model_user(self.request.user), title=self.get_title())
+        except IntegrityError:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставили отзыв на это произведение']
+            })
+
+
+class CommentViewSet(ReplicaReadMixin, ResolvedParentMixin,
+                     TitleVersionMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorAndStaffOrReadOnly, ]
+    pagination_class = FeedPagination
 
-    def get_queryset(self):
-        review = get_object_or_404(
-            Review,
+    def get_review(self):
+        return self.get_parent(
+            'review',
+            Review.objects.select_related('title'),
             id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get("title_id"))
-        return review.comments.all()
+            title__id=self.kwargs.get('title_id'),
+        )
+
+    def get_title_stamp(self):
+        title = self.get_review().title
+        return title.version, title.modified
+
+    def get_queryset(self):
+        # review у комментариев берётся из менеджера без запросов.
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(
+            author=model_user(self.request.user), review=self.get_review())
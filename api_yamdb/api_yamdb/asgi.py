@@ -2,6 +2,7 @@
 ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Catalog reads are served by async views from ``api_yamdb.asgi_urls``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -12,5 +13,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('ROOT_URLCONF', 'api_yamdb.asgi_urls')
 
 application = get_asgi_application()
@@ -0,0 +1,16 @@
+from api.v1 import async_views
+from django.urls import path, re_path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# Под ASGI чтение каталога обслуживают асинхронные представления,
+# остальные адреса те же, что под WSGI.
+urlpatterns = [
+    path('api/v1/titles/', async_views.title_list),
+    path('api/v1/titles/<int:pk>/', async_views.title_detail),
+    re_path(
+        r'^api/v1/titles/(?P<title_id>\d+)/reviews/$',
+        async_views.review_list,
+    ),
+    *wsgi_urlpatterns,
+]
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -41,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,7 +53,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'api_yamdb.urls'
+# asgi.py подставляет api_yamdb.asgi_urls с асинхронными представлениями.
+ROOT_URLCONF = os.getenv('ROOT_URLCONF', default='api_yamdb.urls')
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 TEMPLATES = [
@@ -115,11 +119,23 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=5),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Сколько секунд отпечаток пользователя для отзыва токенов живёт в кэше.
+AUTH_FINGERPRINT_CACHE_TTL = int(os.getenv('AUTH_FINGERPRINT_CACHE_TTL', default=60))
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson, если установлен; иначе стандартный json.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.v1.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.v1.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.RoleJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -131,6 +147,25 @@ REST_FRAMEWORK = {
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', default='mailcatcher')
 EMAIL_PORT = os.getenv('EMAIL_PORT', default=1025)
+# Для django.core.mail.backends.filebased.EmailBackend.
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
+
+# Очередь писем: письма отправляет команда send_emails.
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', default=100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5))
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+EMAIL_OUTBOX_LEASE = 300
+EMAIL_OUTBOX_KEEP_SENT_DAYS = 7
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='api_yamdb'),
+    }
+}
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=300))
 
 
 LOGGING = {
@@ -152,16 +187,32 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'level': 'DEBUG',
-            'handlers': ['console']
+            'level': os.getenv('DJANGO_LOG_LEVEL', default='INFO'),
+            'handlers': ['console'],
+            'propagate': False,
         },
         '': {
-            'level': 'DEBUG',
+            'level': os.getenv('LOG_LEVEL', default='INFO'),
             'handlers': ['console']
         }
     }
 }
 
+# Адреса, с которых доступен /internal/metrics/.
+INTERNAL_IPS = os.getenv('INTERNAL_IPS', default='127.0.0.1').split(',')
+# Если задан, /internal/metrics/ отдаётся по заголовку Authorization: Bearer <токен>.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+
+# Бюджеты запросов к БД по представлениям вида «TitleViewSet.list»;
+# при превышении пишется предупреждение. None отключает проверку.
+QUERY_BUDGETS = {
+    'TitleViewSet.list': 3,
+    'TitleViewSet.retrieve': 3,
+    'ReviewViewSet.list': 5,
+    'CommentViewSet.list': 5,
+}
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', default=20))
+
 PATH_DATA = Path(BASE_DIR, 'static/data/')
 
 DATABASES = {
@@ -171,9 +222,42 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        # Соединение переиспользуется между запросами CONN_MAX_AGE секунд.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
     }
 }
+# Соединение, простоявшее между запросами дольше стольких секунд,
+# проверяется в начале следующего (core.pool); пустое значение отключает
+# проверку.
+DB_HEALTH_CHECK_IDLE = os.getenv('DB_HEALTH_CHECK_IDLE', default='30')
+DB_HEALTH_CHECK_IDLE = float(DB_HEALTH_CHECK_IDLE) if DB_HEALTH_CHECK_IDLE else None
+# Каждый поток процесса gunicorn держит одно соединение с каждой базой.
+# Под ASGI GUNICORN_THREADS — размер пула потоков для работы с базой
+# (core.utils.database_executor).
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', default=1))
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', default=1))
+DB_POOL_SIZE = WEB_CONCURRENCY * GUNICORN_THREADS
+
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1:5432,replica2. Учётные
+# данные и имя базы те же, что у default.
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')), start=1):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+# Реплика с отставанием больше DATABASE_REPLICA_MAX_LAG секунд не используется.
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DATABASE_REPLICA_MAX_LAG', default=5))
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = 5
+# Сколько секунд после записи пользователь читает из основной базы.
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', default=10))
 
 
 STATIC_URL = '/static/'
@@ -1,3 +1,4 @@
+from core.views import metrics
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
@@ -17,4 +18,5 @@ urlpatterns = [
     path('api/schema/redoc/', SpectacularRedocView.as_view(
         url_name='schema'), name='redoc'),
     path('api/', include('api.urls')),
+    path('internal/metrics/', metrics, name='metrics'),
 ]
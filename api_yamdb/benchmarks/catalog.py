@@ -0,0 +1,134 @@
+from core.importer import bulk_insert, reset_sequences
+from django.db.models import Max
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+
+class SyntheticCatalog:
+    """Синтетический каталог заданного размера, вставленный пакетами.
+
+    id задаются явно, начиная с текущего максимума каждой таблицы, так
+    что каталог можно добавить и к непустой базе.
+    """
+
+    def __init__(self, titles=50, genres=20, categories=5,
+                 genres_per_title=3, reviews_per_title=10,
+                 comments_per_review=2, batch_size=1000):
+        self.titles = titles
+        self.genres = max(genres, genres_per_title)
+        self.categories = categories
+        self.genres_per_title = genres_per_title
+        self.reviews_per_title = reviews_per_title
+        self.comments_per_review = comments_per_review
+        self.batch_size = batch_size
+        self.ids = {}
+
+    @property
+    def scale(self):
+        return {
+            'titles': self.titles,
+            'genres': self.genres,
+            'categories': self.categories,
+            'genres_per_title': self.genres_per_title,
+            'reviews_per_title': self.reviews_per_title,
+            'comments_per_review': self.comments_per_review,
+        }
+
+    def first_id(self, model):
+        start = model.objects.aggregate(Max('id'))['id__max'] or 0
+        self.ids[model] = start + 1
+        return start + 1
+
+    def insert(self, model, objects):
+        bulk_insert(model, objects, self.batch_size)
+
+    def generate(self):
+        users = max(self.reviews_per_title, 1)
+        user_id = self.first_id(User)
+        self.insert(User, (
+            User(
+                id=user_id + idx,
+                username=f'bench-{user_id + idx}',
+                email=f'bench-{user_id + idx}@yamdb.ru',
+            )
+            for idx in range(users)
+        ))
+        category_id = self.first_id(Category)
+        self.insert(Category, (
+            Category(
+                id=category_id + idx,
+                name=f'Категория {category_id + idx}',
+                slug=f'bench-category-{category_id + idx}',
+            )
+            for idx in range(self.categories)
+        ))
+        genre_id = self.first_id(Genre)
+        self.insert(Genre, (
+            Genre(
+                id=genre_id + idx,
+                name=f'Жанр {genre_id + idx}',
+                slug=f'bench-genre-{genre_id + idx}',
+            )
+            for idx in range(self.genres)
+        ))
+        title_id = self.first_id(Title)
+        self.insert(Title, (
+            Title(
+                id=title_id + idx,
+                name=f'Произведение {title_id + idx}',
+                year=1900 + idx % 120,
+                description='Синтетическое произведение',
+                category_id=category_id + idx % self.categories,
+            )
+            for idx in range(self.titles)
+        ))
+        self.first_id(TitleGenre)
+        self.insert(TitleGenre, (
+            TitleGenre(
+                title_id=title_id + idx,
+                genre_id=genre_id + (idx + shift) % self.genres,
+            )
+            for idx in range(self.titles)
+            for shift in range(self.genres_per_title)
+        ))
+        review_id = self.first_id(Review)
+        self.insert(Review, (
+            Review(
+                id=review_id + idx * self.reviews_per_title + author,
+                title_id=title_id + idx,
+                author_id=user_id + author,
+                text=f'Синтетический отзыв {idx}-{author}',
+                score=(idx + author) % 10 + 1,
+            )
+            for idx in range(self.titles)
+            for author in range(self.reviews_per_title)
+        ))
+        reviews = self.titles * self.reviews_per_title
+        self.first_id(Comment)
+        self.insert(Comment, (
+            Comment(
+                review_id=review_id + idx,
+                author_id=user_id + (idx + number) % users,
+                text=f'Синтетический комментарий {idx}-{number}',
+            )
+            for idx in range(reviews)
+            for number in range(self.comments_per_review)
+        ))
+        reset_sequences([User, Category, Genre, Title, TitleGenre, Review,
+                         Comment])
+        Title.objects.filter(
+            pk__gte=title_id, pk__lt=title_id + self.titles).rebuild_ratings()
+        return self
+
+    def first(self, model):
+        return self.ids[model]
+
+    def delete(self):
+        """Удаляет каталог, созданный вне транзакции.
+
+        Отзывы, комментарии и связи с жанрами удаляются каскадом вместе
+        с произведениями.
+        """
+        for model in (Title, Genre, Category, User):
+            if model in self.ids:
+                model.objects.filter(pk__gte=self.ids[model]).delete()
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from core.cache import catalog_cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from reviews.models import Title
+
+from .runner import percentile
+
+# Чтение каталога, которое под ASGI обслуживают асинхронные представления.
+CONCURRENCY_SCENARIOS = {
+    'titles-list': '/api/v1/titles/?limit=10',
+    'title-detail': '/api/v1/titles/{title}/',
+    'reviews-list': '/api/v1/titles/{title}/reviews/',
+}
+ASGI_URLCONF = 'api_yamdb.asgi_urls'
+
+
+class SimulatedLatency:
+    """Добавляет задержку к каждому запросу к БД.
+
+    Локальная база отвечает быстрее, чем PostgreSQL в соседнем
+    контейнере; задержка имитирует сетевой обмен, на котором синхронный
+    процесс простаивает. Обёртка ставится на соединения, открытые внутри
+    блока with, и на соединение текущего потока.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.wrapped = weakref.WeakSet()
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+            self.wrapped.add(connection)
+
+    def __enter__(self):
+        if self.seconds:
+            connection_created.connect(self.install)
+            for alias in connections:
+                self.install(connection=connections[alias])
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+        for connection in list(self.wrapped):
+            connection.execute_wrappers.remove(self)
+
+
+class ConcurrencyBenchmark:
+    """Сравнивает WSGI с синхронными воркерами и ASGI под нагрузкой.
+
+    clients клиентов одновременно отправляют по requests запросов подряд.
+    Под WSGI их обслуживают workers синхронных воркеров, каждый по одному
+    запросу за раз, остальные клиенты ждут. Под ASGI все запросы
+    принимает один цикл событий. Задержка запроса включает ожидание
+    свободного воркера. Каталог должен быть закоммичен: асинхронные
+    представления читают базу из других потоков.
+    """
+
+    def __init__(self, catalog, clients=50, requests=5, workers=3,
+                 db_latency=0.002, warm_cache=False, scenarios=None):
+        self.catalog = catalog
+        self.clients = clients
+        self.requests = requests
+        self.workers = workers
+        self.db_latency = db_latency
+        self.warm_cache = warm_cache
+        self.scenarios = scenarios or list(CONCURRENCY_SCENARIOS)
+
+    def before_request(self):
+        if not self.warm_cache:
+            catalog_cache.bump('categories', 'genres', 'titles')
+
+    def check(self, response, path):
+        if response.status_code >= 400:
+            raise RuntimeError(f'GET {path}: {response.status_code}')
+
+    def run_wsgi(self, path, requests):
+        slots = threading.BoundedSemaphore(self.workers)
+
+        def client():
+            http = Client()
+            timings = []
+            try:
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    with slots:
+                        self.before_request()
+                        response = http.get(path)
+                    timings.append(time.perf_counter() - started)
+                    self.check(response, path)
+            finally:
+                connections.close_all()
+            return timings
+
+        with ThreadPoolExecutor(max_workers=self.clients) as executor:
+            futures = [executor.submit(client) for _ in range(self.clients)]
+            return [
+                value for future in futures for value in future.result()]
+
+    async def run_asgi(self, path, requests):
+        async def client():
+            http = AsyncClient()
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                self.before_request()
+                response = await http.get(path)
+                timings.append(time.perf_counter() - started)
+                self.check(response, path)
+            return timings
+
+        results = await asyncio.gather(
+            *(client() for _ in range(self.clients)))
+        return [value for timings in results for value in timings]
+
+    def measure(self, run, path):
+        # Первый запрос прогревает импорты и разбор адресов.
+        run(path, 1)
+        started = time.perf_counter()
+        timings = [value * 1000 for value in run(path, self.requests)]
+        elapsed = time.perf_counter() - started
+        return {
+            'rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
+
+    def run(self):
+        params = {'title': self.catalog.first(Title)}
+        results = {}
+        with SimulatedLatency(self.db_latency):
+            for name in self.scenarios:
+                path = CONCURRENCY_SCENARIOS[name].format(**params)
+                wsgi = self.measure(self.run_wsgi, path)
+                with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+                    asgi = self.measure(async_to_sync(self.run_asgi), path)
+                results[name] = {'wsgi': wsgi, 'asgi': asgi}
+        return {
+            'clients': self.clients,
+            'requests': self.requests,
+            'workers': self.workers,
+            'db_latency_ms': self.db_latency * 1000,
+            'scale': self.catalog.scale,
+            'scenarios': results,
+        }
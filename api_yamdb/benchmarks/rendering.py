@@ -0,0 +1,85 @@
+import io
+import time
+
+from api.v1.parsers import FastJSONParser
+from api.v1.renderers import FastJSONRenderer, orjson
+from api.v1.serializers import ReviewSerializer, TitleSerializerGet
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Title
+
+from .runner import percentile
+
+# Отзыв обычной длины: синтетические отзывы каталога слишком короткие.
+REVIEW_TEXT = (
+    'Неторопливое начало быстро окупается: к середине сюжет набирает '
+    'ход, а финал заставляет пересмотреть всё, что было до него. '
+)
+
+
+class RenderingBenchmark:
+    """Сравнивает JSONRenderer и FastJSONRenderer на ответах v1.
+
+    Данные — вывод ReviewSerializer и TitleSerializerGet для страницы
+    синтетического каталога; рендеринг и разбор замеряются без HTTP.
+    """
+
+    def __init__(self, catalog, page=100, repeat=200, text_length=600):
+        self.catalog = catalog
+        self.page = page
+        self.repeat = repeat
+        self.text_length = text_length
+
+    def payloads(self):
+        first_title = self.catalog.first(Title)
+        reviews = ReviewSerializer(
+            Review.objects.select_related('title', 'author').filter(
+                title_id__gte=first_title).order_by('pk')[:self.page],
+            many=True,
+        ).data
+        text = REVIEW_TEXT * (self.text_length // len(REVIEW_TEXT) + 1)
+        for review in reviews:
+            review['text'] = text[:self.text_length]
+        titles = TitleSerializerGet(
+            Title.objects.select_related('category').prefetch_related(
+                'genre').filter(pk__gte=first_title).order_by(
+                    'pk')[:self.page],
+            many=True,
+        ).data
+        return {'reviews': reviews, 'titles': titles}
+
+    def timings(self, func, *args):
+        func(*args)
+        values = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            func(*args)
+            values.append((time.perf_counter() - started) * 1_000_000)
+        return {
+            'p50_us': round(percentile(values, 50), 1),
+            'p95_us': round(percentile(values, 95), 1),
+        }
+
+    def measure(self, data):
+        body = JSONRenderer().render(data)
+        result = {'bytes': len(body)}
+        for name, renderer, parser in (
+            ('stdlib', JSONRenderer(), JSONParser()),
+            ('orjson', FastJSONRenderer(), FastJSONParser()),
+        ):
+            result[f'render_{name}'] = self.timings(renderer.render, data)
+            result[f'parse_{name}'] = self.timings(
+                lambda: parser.parse(io.BytesIO(body)))
+        return result
+
+    def run(self):
+        return {
+            'orjson': orjson.__version__ if orjson else None,
+            'page': self.page,
+            'repeat': self.repeat,
+            'text_length': self.text_length,
+            'payloads': {
+                name: self.measure(data)
+                for name, data in self.payloads().items()
+            },
+        }
@@ -0,0 +1,167 @@
+import json
+import math
+import time
+
+from core.cache import catalog_cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Review, Title
+from users.authentication import issue_access_token
+from users.models import User
+
+# Имя сценария: (метод, путь, тело запроса). В пути подставляются id
+# и слаги первых объектов синтетического каталога.
+SCENARIOS = {
+    'titles-list': ('get', '/api/v1/titles/?limit=10', None),
+    'titles-list-100': ('get', '/api/v1/titles/?limit=100', None),
+    'titles-filter': (
+        'get', '/api/v1/titles/?genre={genre}&category={category}', None),
+    'titles-search': ('get', '/api/v1/titles/?search=Произведение', None),
+    'title-detail': ('get', '/api/v1/titles/{title}/', None),
+    'categories-list': ('get', '/api/v1/categories/', None),
+    'genres-list': ('get', '/api/v1/genres/', None),
+    'reviews-list': ('get', '/api/v1/titles/{title}/reviews/', None),
+    'reviews-cursor': (
+        'get', '/api/v1/titles/{title}/reviews/?cursor=&limit=10', None),
+    'comments-list': (
+        'get', '/api/v1/titles/{title}/reviews/{review}/comments/', None),
+    'review-create': (
+        'post', '/api/v1/titles/{title}/reviews/',
+        {'text': 'Отзыв из бенчмарка', 'score': 7}),
+    'comment-create': (
+        'post', '/api/v1/titles/{title}/reviews/{review}/comments/',
+        {'text': 'Комментарий из бенчмарка'}),
+}
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class BenchmarkRunner:
+    """Прогоняет сценарии через тестовый клиент Django.
+
+    Каждый запрос выполняется в точке сохранения, которая затем
+    откатывается, поэтому сценарии записи не меняют каталог. Перед
+    запросом версии кэша каталога сдвигаются, чтобы мерить работу
+    с базой, а не попадания в кэш, если не указан warm_cache.
+    """
+
+    def __init__(self, catalog, repeat=20, warm_cache=False,
+                 scenarios=None):
+        self.catalog = catalog
+        self.repeat = repeat
+        self.warm_cache = warm_cache
+        self.scenarios = scenarios or list(SCENARIOS)
+        self.client = Client()
+        author = User.objects.create(
+            username=f'bench-author-{time.monotonic_ns()}',
+            email=f'bench-author-{time.monotonic_ns()}@yamdb.ru',
+        )
+        self.headers = {
+            'HTTP_AUTHORIZATION': f'Bearer {issue_access_token(author)}'}
+
+    def url_params(self):
+        title = self.catalog.first(Title)
+        return {
+            'title': title,
+            'review': Review.objects.filter(
+                title_id=title).order_by('pk').values_list(
+                    'pk', flat=True).first(),
+            'genre': Genre.objects.get(pk=self.catalog.first(Genre)).slug,
+            'category': Category.objects.get(
+                pk=self.catalog.first(Category)).slug,
+        }
+
+    def request(self, method, path, data):
+        if not self.warm_cache:
+            catalog_cache.bump('categories', 'genres', 'titles')
+        kwargs = dict(self.headers)
+        if data is not None:
+            kwargs.update(
+                data=json.dumps(data), content_type='application/json')
+        savepoint = transaction.savepoint()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(self.client, method)(path, **kwargs)
+                elapsed = time.perf_counter() - started
+        finally:
+            transaction.savepoint_rollback(savepoint)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{method.upper()} {path}: {response.status_code}')
+        return elapsed, len(queries)
+
+    def run_scenario(self, name, params):
+        method, path, data = SCENARIOS[name]
+        path = path.format(**params)
+        # Первый запрос прогревает импорты и подготовленные выражения.
+        self.request(method, path, data)
+        timings, queries = [], 0
+        for _ in range(self.repeat):
+            elapsed, count = self.request(method, path, data)
+            timings.append(elapsed * 1000)
+            queries = max(queries, count)
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': queries,
+        }
+
+    def run(self):
+        params = self.url_params()
+        with transaction.atomic():
+            results = {
+                name: self.run_scenario(name, params)
+                for name in self.scenarios
+            }
+        return {
+            'vendor': connection.vendor,
+            'scale': self.catalog.scale,
+            'repeat': self.repeat,
+            'scenarios': results,
+        }
+
+
+def compare(results, baseline, tolerance=None):
+    """Регрессии относительно базовой линии.
+
+    Рост числа запросов к БД считается регрессией всегда, рост p95 —
+    только если задан допуск tolerance (доля, например 0.2).
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        expected = baseline['scenarios'].get(name)
+        if expected is None:
+            continue
+        if current['queries'] > expected['queries']:
+            regressions.append(
+                f'{name}: запросов к БД {current["queries"]} '
+                f'вместо {expected["queries"]}'
+            )
+        if (
+            tolerance is not None
+            and current['p95_ms'] > expected['p95_ms'] * (1 + tolerance)
+        ):
+            regressions.append(
+                f'{name}: p95 {current["p95_ms"]} мс '
+                f'вместо {expected["p95_ms"]} мс'
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+        f.write('\n')
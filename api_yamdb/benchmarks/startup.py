@@ -0,0 +1,114 @@
+"""Время запуска процесса и первых запросов с прогревом и без.
+
+Каждый замер идёт в отдельном интерпретаторе: в уже работающем процессе
+ленивые структуры Django и DRF построены и первый запрос не отличить
+от второго. Запуск пробы:
+
+    python -m benchmarks.startup [--warm] [путь ...]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+# Списки каталога отвечают и на пустой базе.
+STARTUP_PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request(application, path):
+    environ = {'PATH_INFO': path, 'wsgi.input': BytesIO()}
+    setup_testing_defaults(environ)
+    status = []
+    started = time.perf_counter()
+    body = b''.join(application(
+        environ, lambda code, headers, exc_info=None: status.append(code)))
+    elapsed = time.perf_counter() - started
+    code = int(status[0].split()[0])
+    if code >= 400:
+        raise RuntimeError(f'GET {path}: {code} {body[:200]!r}')
+    return elapsed * 1000
+
+
+def probe(warm, paths):
+    started = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+    result = {
+        'app_load_ms': round((time.perf_counter() - started) * 1000, 3),
+        'warm_up_ms': 0,
+        'paths': {},
+    }
+    if warm:
+        from core.warmup import warm_up
+        result['warm_up_ms'] = round(sum(warm_up().values()), 3)
+    for path in paths:
+        first = request(application, path)
+        second = request(application, path)
+        result['paths'][path] = {
+            'first_ms': round(first, 3),
+            'second_ms': round(second, 3),
+        }
+    return result
+
+
+class StartupBenchmark:
+    """Запускает пробу repeat раз без прогрева и с прогревом.
+
+    Для каждого режима берётся медиана по запускам. Окружение
+    наследуется, поэтому проба ходит в ту же базу, что и команда.
+    """
+
+    def __init__(self, repeat=5, paths=None, environ=None):
+        self.repeat = repeat
+        self.paths = list(paths or STARTUP_PATHS)
+        self.environ = environ
+
+    def run_probe(self, warm):
+        command = [sys.executable, '-m', 'benchmarks.startup', *self.paths]
+        if warm:
+            command.insert(3, '--warm')
+        env = dict(os.environ if self.environ is None else self.environ)
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        completed = subprocess.run(
+            command, cwd=BASE_DIR, env=env, check=True,
+            stdout=subprocess.PIPE)
+        return json.loads(completed.stdout.decode().splitlines()[-1])
+
+    def summarize(self, runs):
+        def median(values):
+            return round(sorted(values)[len(values) // 2], 3)
+
+        return {
+            'app_load_ms': median([run['app_load_ms'] for run in runs]),
+            'warm_up_ms': median([run['warm_up_ms'] for run in runs]),
+            'paths': {
+                path: {
+                    key: median([run['paths'][path][key] for run in runs])
+                    for key in ('first_ms', 'second_ms')
+                }
+                for path in self.paths
+            },
+        }
+
+    def run(self):
+        modes = {}
+        for mode, warm in (('cold', False), ('warm', True)):
+            modes[mode] = self.summarize(
+                [self.run_probe(warm) for _ in range(self.repeat)])
+        return {'repeat': self.repeat, 'modes': modes}
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    warm = '--warm' in arguments
+    paths = [value for value in arguments if value != '--warm']
+    print(json.dumps(probe(warm, paths or STARTUP_PATHS)))
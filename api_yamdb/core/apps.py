@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from .cache import check_shared_cache
+        from .metrics import install_query_recorder
+        from .pool import (checkout_connections, on_connection_created,
+                           release_connections)
+        connection_created.connect(install_query_recorder)
+        connection_created.connect(on_connection_created)
+        request_started.connect(checkout_connections)
+        request_finished.connect(release_connections)
+        check_shared_cache()
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import time
+
+from core.routing import primary_reads
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from rest_framework.response import Response
+
+# Кэши, которые не видны другим процессам gunicorn.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_requirements():
+    """Алиасы кэша, которые должны быть общими для процессов, и зачем."""
+    requirements = []
+    if settings.WEB_CONCURRENCY > 1:
+        # Отозванный токен иначе принимают все процессы, кроме отозвавшего.
+        requirements.append(
+            ('default', 'отпечаток пользователя для отзыва токенов'))
+        requirements.append(
+            (settings.CATALOG_CACHE_ALIAS,
+             'версии кэша каталога, которые сбрасывает запись'))
+    if settings.DATABASE_REPLICAS:
+        requirements.append(
+            ('default', 'закрепление за основной базой после записи'))
+    return requirements
+
+
+def check_shared_cache():
+    for alias, purpose in shared_cache_requirements():
+        backend = settings.CACHES[alias]['BACKEND']
+        if backend in PROCESS_LOCAL_CACHES:
+            raise ImproperlyConfigured(
+                f'Кэш {alias} ({backend}) виден только своему процессу, '
+                f'а в нём хранится {purpose}. Укажите общий кэш в '
+                'CACHE_BACKEND, например django_redis.cache.RedisCache.')
+
+
+class CatalogCache:
+    """Кэш ответов каталога с версионированными пространствами имён.
+
+    Ключ ответа включает текущие версии всех пространств, от которых он
+    зависит, поэтому инвалидация — это увеличение версии, а не поиск и
+    удаление ключей. Устаревшие записи просто вытесняются по таймауту.
+    """
+
+    prefix = 'catalog'
+
+    @property
+    def cache(self):
+        return caches[settings.CATALOG_CACHE_ALIAS]
+
+    def _version_key(self, namespace):
+        return f'{self.prefix}:version:{namespace}'
+
+    def _stats_key(self, name, outcome):
+        return f'{self.prefix}:stats:{name}:{outcome}'
+
+    def versions(self, namespaces):
+        keys = [self._version_key(namespace) for namespace in namespaces]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # Начальная версия зависит от времени: если ключ версии
+                # вытеснят, старые записи не совпадут с новой версией.
+                self.cache.add(key, time.time_ns(), None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def bump(self, *namespaces):
+        for namespace in namespaces:
+            key = self._version_key(namespace)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, time.time_ns(), None)
+        logging.debug(f'Сброшены пространства кэша {namespaces}')
+
+    def bump_on_commit(self, *namespaces):
+        # Повторный сброс после коммита не даёт конкурентному чтению
+        # закэшировать данные, прочитанные до завершения транзакции.
+        self.bump(*namespaces)
+        transaction.on_commit(lambda: self.bump(*namespaces))
+
+    def make_key(self, namespaces, path, params):
+        versions = '.'.join(str(version) for version in self.versions(
+            namespaces))
+        digest = hashlib.sha1(
+            repr((path, sorted(params))).encode()).hexdigest()
+        return f'{self.prefix}:{versions}:{digest}'
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT)
+
+    def count(self, name, outcome):
+        key = self._stats_key(name, outcome)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, None):
+                self.cache.incr(key)
+
+    def stats(self, names):
+        keys = {
+            (name, outcome): self._stats_key(name, outcome)
+            for name in names for outcome in ('hits', 'misses')
+        }
+        values = self.cache.get_many(keys.values())
+        stats = {name: {'hits': 0, 'misses': 0} for name in names}
+        for (name, outcome), key in keys.items():
+            stats[name][outcome] = values.get(key, 0)
+        return stats
+
+
+catalog_cache = CatalogCache()
+
+
+class CachedResponseMixin:
+    """Отдаёт GET-ответы list/retrieve из кэша каталога.
+
+    Ключ строится по пути и только тем параметрам запроса, которые влияют
+    на ответ: полям filterset_class, поиску, сортировке и пагинации.
+    """
+
+    cache_namespaces = ()
+    cache_anonymous_only = False
+    cache_paginator_params = (
+        'limit_query_param', 'offset_query_param',
+        'page_query_param', 'page_size_query_param', 'cursor_query_param',
+    )
+    cache_backend_params = ('search_param', 'ordering_param')
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get_cache_query_params(self):
+        params = set()
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is not None:
+            params.update(filterset_class.base_filters)
+        for backend in self.filter_backends:
+            params.update(
+                getattr(backend, name) for name in self.cache_backend_params
+                if getattr(backend, name, None))
+        params.update(
+            getattr(self.paginator, name)
+            for name in self.cache_paginator_params
+            if getattr(self.paginator, name, None))
+        return params
+
+    def response_is_cacheable(self, request):
+        return not (
+            self.cache_anonymous_only and request.user.is_authenticated)
+
+    def get_cache_key(self, request):
+        query_params = self.get_cache_query_params()
+        return catalog_cache.make_key(
+            self.get_cache_namespaces(),
+            request.path,
+            [
+                (name, request.query_params.getlist(name))
+                for name in query_params if name in request.query_params
+            ],
+        )
+
+    def get_cached_data(self, key):
+        data = catalog_cache.get(key)
+        catalog_cache.count(
+            self.basename, 'misses' if data is None else 'hits')
+        return data
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.response_is_cacheable(request):
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = self.get_cached_data(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        # Ответ живёт в кэше дольше, чем отстаёт реплика, поэтому кэш
+        # заполняется только из основной базы.
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
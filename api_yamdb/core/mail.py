@@ -0,0 +1,146 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, body, to_email, from_email=None):
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        to_email=to_email,
+        from_email=from_email or settings.EMAIL_NO_REPLY,
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_MAX_RETRY_DELAY,
+    ))
+
+
+class OutboxWorker:
+    """Отправляет письма из очереди пакетами через одно соединение.
+
+    Взятые в работу письма получают аренду: next_attempt_at сдвигается
+    на lease секунд, так что параллельные обработчики их пропускают, а
+    после падения обработчика письма вернутся в очередь сами.
+    """
+
+    def __init__(self, batch_size=None, max_attempts=None, lease=None):
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.max_attempts = (
+            max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+        self.lease = timedelta(
+            seconds=lease or settings.EMAIL_OUTBOX_LEASE)
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:self.batch_size]
+            )
+            OutboxEmail.objects.filter(
+                pk__in=[message.pk for message in batch]
+            ).update(next_attempt_at=now + self.lease)
+        return batch
+
+    def send(self, batch):
+        sent, failed = [], []
+        try:
+            with mail.get_connection() as connection:
+                for message in batch:
+                    try:
+                        connection.send_messages([mail.EmailMessage(
+                            message.subject, message.body,
+                            message.from_email, [message.to_email],
+                        )])
+                    except Exception as exc:
+                        failed.append((message, exc))
+                    else:
+                        sent.append(message)
+        except Exception as exc:
+            # Не удалось открыть соединение: повторяем весь остаток.
+            done = {message.pk for message in sent}
+            done.update(message.pk for message, _ in failed)
+            failed.extend(
+                (message, exc) for message in batch
+                if message.pk not in done
+            )
+        return sent, failed
+
+    def record(self, sent, failed):
+        now = timezone.now()
+        for message in sent:
+            message.status = OutboxEmail.SENT
+            message.sent_at = now
+            message.attempts += 1
+            message.last_error = ''
+        for message, exc in failed:
+            message.attempts += 1
+            message.last_error = f'{type(exc).__name__}: {exc}'
+            if message.attempts >= self.max_attempts:
+                message.status = OutboxEmail.FAILED
+                logger.error(
+                    'Письмо %s для %s не отправлено после %d попыток: %s',
+                    message.pk, message.to_email, message.attempts, exc)
+            else:
+                message.next_attempt_at = now + retry_delay(message.attempts)
+        OutboxEmail.objects.bulk_update(
+            sent + [message for message, _ in failed],
+            ('status', 'sent_at', 'attempts', 'last_error', 'next_attempt_at'),
+        )
+
+    def run_once(self):
+        batch = self.claim()
+        if not batch:
+            return 0, 0
+        sent, failed = self.send(batch)
+        self.record(sent, failed)
+        return len(sent), len(failed)
+
+    @staticmethod
+    def purge_sent(days):
+        return OutboxEmail.objects.filter(
+            status=OutboxEmail.SENT,
+            sent_at__lt=timezone.now() - timedelta(days=days),
+        ).delete()[0]
+
+
+def render_queue_metrics():
+    """Глубина очереди писем в текстовом формате Prometheus."""
+    counts = dict.fromkeys((OutboxEmail.PENDING, OutboxEmail.FAILED), 0)
+    counts.update(
+        OutboxEmail.objects.filter(status__in=counts).values_list(
+            'status').annotate(Count('id')).order_by()
+    )
+    oldest = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING).aggregate(Min('created'))['created__min']
+    age = (timezone.now() - oldest).total_seconds() if oldest else 0
+    lines = [
+        '# HELP yamdb_email_outbox_messages Письма в очереди по статусам',
+        '# TYPE yamdb_email_outbox_messages gauge',
+    ]
+    lines.extend(
+        f'yamdb_email_outbox_messages{{status="{status}"}} {count}'
+        for status, count in sorted(counts.items())
+    )
+    lines.extend((
+        '# HELP yamdb_email_outbox_oldest_pending_seconds '
+        'Возраст самого старого неотправленного письма',
+        '# TYPE yamdb_email_outbox_oldest_pending_seconds gauge',
+        f'yamdb_email_outbox_oldest_pending_seconds {age:.3f}',
+    ))
+    return '\n'.join(lines) + '\n'
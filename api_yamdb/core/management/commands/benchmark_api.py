@@ -0,0 +1,84 @@
+from pathlib import Path
+
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.runner import (SCENARIOS, BenchmarkRunner, compare,
+                               load_baseline, save_results)
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+BASELINE = Path(__file__).resolve().parents[3] / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетический каталог, замеряет задержку и число запросов '
+        'к БД основных эндпоинтов v1 и сравнивает их с базовой линией. '
+        'Данные удаляются откатом транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=50)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--genres-per-title', type=int, default=3)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=list(SCENARIOS),
+            help='Прогнать только указанные сценарии',
+        )
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Не сбрасывать кэш каталога перед запросами',
+        )
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON')
+        parser.add_argument(
+            '--baseline',
+            nargs='?',
+            const=BASELINE,
+            help='Сравнить с базовой линией (по умолчанию benchmarks/'
+                 'baseline.json)',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            help='Допустимый рост p95 при сравнении, доля от базовой линии',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            catalog = SyntheticCatalog(
+                titles=options['titles'],
+                genres=options['genres'],
+                genres_per_title=options['genres_per_title'],
+                reviews_per_title=options['reviews_per_title'],
+                comments_per_review=options['comments_per_review'],
+            ).generate()
+            results = BenchmarkRunner(
+                catalog,
+                repeat=options['repeat'],
+                warm_cache=options['warm_cache'],
+                scenarios=options['scenario'],
+            ).run()
+            transaction.set_rollback(True)
+        for name, result in results['scenarios'].items():
+            self.stdout.write(
+                f'{name:<16} p50 {result["p50_ms"]:>8.2f} мс  '
+                f'p95 {result["p95_ms"]:>8.2f} мс  '
+                f'p99 {result["p99_ms"]:>8.2f} мс  '
+                f'запросов {result["queries"]}'
+            )
+        if options['output']:
+            save_results(results, options['output'])
+        if options['baseline']:
+            regressions = compare(
+                results, load_baseline(options['baseline']),
+                options['tolerance'],
+            )
+            if regressions:
+                raise CommandError('\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,68 @@
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.concurrency import CONCURRENCY_SCENARIOS, ConcurrencyBenchmark
+from benchmarks.runner import save_results
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержку чтения каталога '
+        'под WSGI с синхронными воркерами и под ASGI при множестве '
+        'одновременных клиентов. Синтетический каталог коммитится и '
+        'удаляется после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=50)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument(
+            '--requests', type=int, default=5,
+            help='Запросов от каждого клиента')
+        parser.add_argument(
+            '--workers', type=int, default=3,
+            help='Синхронных воркеров WSGI')
+        parser.add_argument(
+            '--db-latency', type=float, default=2,
+            help='Задержка каждого запроса к БД, мс')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=list(CONCURRENCY_SCENARIOS),
+            help='Прогнать только указанные сценарии',
+        )
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Не сбрасывать кэш каталога перед запросами',
+        )
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON')
+
+    def handle(self, *args, **options):
+        catalog = SyntheticCatalog(
+            titles=options['titles'],
+            reviews_per_title=options['reviews_per_title'],
+        ).generate()
+        try:
+            results = ConcurrencyBenchmark(
+                catalog,
+                clients=options['clients'],
+                requests=options['requests'],
+                workers=options['workers'],
+                db_latency=options['db_latency'] / 1000,
+                warm_cache=options['warm_cache'],
+                scenarios=options['scenario'],
+            ).run()
+        finally:
+            catalog.delete()
+        for name, modes in results['scenarios'].items():
+            for mode, result in modes.items():
+                self.stdout.write(
+                    f'{name:<14} {mode:<5} {result["rps"]:>8.1f} зап/с  '
+                    f'p50 {result["p50_ms"]:>8.2f} мс  '
+                    f'p95 {result["p95_ms"]:>8.2f} мс  '
+                    f'p99 {result["p99_ms"]:>8.2f} мс'
+                )
+        if options['output']:
+            save_results(results, options['output'])
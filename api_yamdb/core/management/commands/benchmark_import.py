@@ -0,0 +1,80 @@
+import time
+
+from core.importer import bulk_insert
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from reviews.models import Review, Title
+from users.models import User
+
+
+def synthetic_reviews(count, title_ids, author_ids):
+    """Отзывы без повторов пары (произведение, автор)."""
+    authors = len(author_ids)
+    for idx in range(count):
+        yield Review(
+            title_id=title_ids[idx // authors],
+            author_id=author_ids[idx % authors],
+            text=f'Синтетический отзыв №{idx}',
+            score=idx % 10 + 1,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость пакетной вставки синтетических отзывов. '
+        'Данные удаляются откатом транзакции, если не указан --keep.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=1_000_000)
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Число авторов; произведений создаётся reviews / users',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 5000],
+        )
+        parser.add_argument('--ignore-conflicts', action='store_true')
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'СУБД: {connection.vendor}, отзывов: {options["reviews"]}')
+        for batch_size in options['batch_size']:
+            with transaction.atomic():
+                elapsed = self.run_once(batch_size, options)
+                if not options['keep']:
+                    transaction.set_rollback(True)
+            self.stdout.write(
+                f'batch_size={batch_size}: {elapsed:.2f} с, '
+                f'{options["reviews"] / elapsed:.0f} строк/с'
+            )
+
+    def run_once(self, batch_size, options):
+        users = options['users']
+        titles = -(-options['reviews'] // users)
+        prefix = f'bench-{time.monotonic_ns()}'
+        bulk_insert(User, (
+            User(username=f'{prefix}-{idx}', email=f'{prefix}-{idx}@yamdb.ru')
+            for idx in range(users)
+        ), batch_size)
+        bulk_insert(Title, (
+            Title(name=f'{prefix}-{idx}', year=2000) for idx in range(titles)
+        ), batch_size)
+        author_ids = list(User.objects.filter(
+            username__startswith=prefix).values_list('id', flat=True))
+        title_ids = list(Title.objects.filter(
+            name__startswith=prefix).values_list('id', flat=True))
+        started = time.monotonic()
+        bulk_insert(
+            Review,
+            synthetic_reviews(options['reviews'], title_ids, author_ids),
+            batch_size,
+            options['ignore_conflicts'],
+        )
+        return time.monotonic() - started
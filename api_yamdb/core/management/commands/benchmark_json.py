@@ -0,0 +1,55 @@
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.rendering import RenderingBenchmark
+from benchmarks.runner import save_results
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает рендеринг и разбор JSON стандартным json и orjson на '
+        'выводе ReviewSerializer и TitleSerializerGet. Данные удаляются '
+        'откатом транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument(
+            '--page', type=int, default=100,
+            help='Объектов в одном ответе')
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--text-length', type=int, default=600,
+            help='Длина текста отзыва, символов')
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            catalog = SyntheticCatalog(
+                titles=options['titles'],
+                reviews_per_title=options['reviews_per_title'],
+            ).generate()
+            results = RenderingBenchmark(
+                catalog,
+                page=options['page'],
+                repeat=options['repeat'],
+                text_length=options['text_length'],
+            ).run()
+            transaction.set_rollback(True)
+        if results['orjson'] is None:
+            self.stdout.write(
+                self.style.WARNING('orjson не установлен, оба варианта '
+                                   'используют стандартный json'))
+        for name, result in results['payloads'].items():
+            for operation in ('render', 'parse'):
+                stdlib = result[f'{operation}_stdlib']['p50_us']
+                fast = result[f'{operation}_orjson']['p50_us']
+                self.stdout.write(
+                    f'{name:<8} {operation:<6} {result["bytes"]:>8} байт  '
+                    f'json {stdlib:>9.1f} мкс  orjson {fast:>9.1f} мкс  '
+                    f'×{stdlib / fast:.1f}'
+                )
+        if options['output']:
+            save_results(results, options['output'])
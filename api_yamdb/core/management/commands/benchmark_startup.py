@@ -0,0 +1,34 @@
+from benchmarks.runner import save_results
+from benchmarks.startup import STARTUP_PATHS, StartupBenchmark
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет загрузку приложения и задержку первого и второго запроса '
+        'в новом процессе без прогрева и с прогревом core.warmup.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Запусков процесса в каждом режиме')
+        parser.add_argument(
+            '--path', action='append',
+            help=f'Адрес для GET, по умолчанию {", ".join(STARTUP_PATHS)}')
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON')
+
+    def handle(self, *args, **options):
+        results = StartupBenchmark(
+            repeat=options['repeat'], paths=options['path']).run()
+        for mode, result in results['modes'].items():
+            self.stdout.write(
+                f'{mode:<5} загрузка {result["app_load_ms"]:>8.1f} мс  '
+                f'прогрев {result["warm_up_ms"]:>8.1f} мс')
+            for path, timings in result['paths'].items():
+                self.stdout.write(
+                    f'      {path:<30} первый {timings["first_ms"]:>8.2f} мс  '
+                    f'второй {timings["second_ms"]:>8.2f} мс')
+        if options['output']:
+            save_results(results, options['output'])
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from core.snapshot import SnapshotWriter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает таблицы загрузки в сжатые csv формата COPY '
+        'с манифестом и контрольными суммами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=Path(settings.PATH_DATA, 'snapshot'),
+            help='Каталог снимка',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Число строк, читаемых курсором за раз (кроме PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        manifest = SnapshotWriter(
+            options['path'], chunk_size=options['chunk_size']).run()
+        for table in manifest['tables']:
+            self.stdout.write(f'{table["table"]}: {table["rows"]} строк')
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок сохранён в {options["path"]}'))
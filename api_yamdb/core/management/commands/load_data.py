@@ -2,13 +2,20 @@ import csv
 import logging
 import os
 import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
+from core.cache import catalog_cache
+from core.importer import (StreamLoadData, bulk_insert, clean_tables,
+                           model_dependencies)
 from core.utils import email_is_valid
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.core.validators import validate_email
+from django.db import connection, transaction
 from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
 from users.models import User
 
@@ -33,6 +40,32 @@ PATH_FILES = {
 }
 
 
+def emails_are_valid(emails):
+    """Проверка столбца email по правилам validate_email.
+
+    Регулярные выражения валидатора применяются ко всему столбцу сразу.
+    Адреса, отклонённые ими, перепроверяются validate_email поштучно,
+    чтобы не разойтись с ним на IDN-доменах и IP-литералах.
+    """
+    parts = emails.str.rpartition('@')
+    user_part, separator, domain_part = parts[0], parts[1], parts[2]
+    valid = (
+        (separator == '@')
+        & user_part.str.match(
+            validate_email.user_regex.pattern,
+            flags=validate_email.user_regex.flags, na=False)
+        & (
+            domain_part.isin(validate_email.domain_allowlist)
+            | domain_part.str.match(
+                validate_email.domain_regex.pattern,
+                flags=validate_email.domain_regex.flags, na=False)
+        )
+    )
+    recheck = ~valid & emails.notna()
+    valid[recheck] = emails[recheck].map(email_is_valid)
+    return valid.astype(bool)
+
+
 class Data:
     def __dir_is_exist(self, path):
         if not os.path.exists(path):
@@ -116,31 +149,26 @@ class Data:
     def __prepare_users(self):
         logging.debug('Подготавливаем users')
         users = pd.read_csv(PATH_FILES.get('users'))
-        users[['is_superuser', 'is_staff', 'is_active']] = None
         allowed_roles = ['admin', 'superuser', 'moderator', 'user']
-        lst_idx_to_remove = []
-        for idx, row in users.iterrows():
-            is_superuser = 0
-            is_staff = 0
-            is_active = 1
-            if row['role'] not in allowed_roles:
-                lst_idx_to_remove.append(idx)
-                continue
-            if not email_is_valid(row['email']):
-                lst_idx_to_remove.append(idx)
-                continue
-            if row['role'] == 'admin':
-                is_staff = 1
-            if row['role'] == 'superuser':
-                is_staff = 1
-                is_superuser = 1
-            users.at[idx, 'is_staff'] = is_staff
-            users.at[idx, 'is_superuser'] = is_superuser
-            users.at[idx, 'is_active'] = is_active
-        users.drop(index=lst_idx_to_remove, inplace=True)
-        users.drop_duplicates(['id'], keep='first', inplace=True)
-        users.drop_duplicates(['username'], keep='first', inplace=True)
-        users.drop_duplicates(['email'], keep='first', inplace=True)
+        reasons = pd.Series(None, index=users.index, dtype=object)
+        reasons[~emails_are_valid(users['email'])] = 'email'
+        reasons[~users['role'].isin(allowed_roles)] = 'role'
+        for column in ('id', 'username', 'email'):
+            duplicated = reasons.isna() & users[reasons.isna()].duplicated(
+                [column], keep='first').reindex(users.index, fill_value=False)
+            reasons[duplicated] = f'duplicate {column}'
+        rejected = users[reasons.notna()].assign(reason=reasons)
+        if not rejected.empty:
+            report = Path(self.__report_dir, 'users_rejected.csv')
+            rejected.to_csv(report, index=False)
+            logging.warning(
+                f'Отклонено пользователей: {len(rejected)}, '
+                f'отчёт сохранён в {report}')
+        users = users[reasons.isna()].copy()
+        users['is_superuser'] = (users['role'] == 'superuser').astype(int)
+        users['is_staff'] = users['role'].isin(
+            ['admin', 'superuser']).astype(int)
+        users['is_active'] = 1
         users.to_csv(PATH_FILES.get('users'), index=False)
         return True
 
@@ -210,87 +238,217 @@ class Data:
         list_files = self.__get_csv_file()
         dst_dir = self.__create_dir_for_original()
         self.__copy_original(list_files, dst_dir)
+        self.__report_dir = Path(settings.PATH_DATA, dst_dir)
         self.__prepare_data()
 
 
 class LoadData:
-    def __clean_data(self):
-        for model in MODELS.keys():
-            model.objects.all().delete()
-        logging.debug('Все модели очищены')
+    def __init__(self, batch_size=1000, ignore_conflicts=False, workers=1,
+                 report=logging.info):
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.workers = workers
+        self.report = report
 
-    def __load_data_users(self, model, key):
-        users_list = []
+    def __read_rows(self, key):
         with open(PATH_FILES.get(key), newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                users_list.append(model(
-                    id=row.get('id'),
-                    username=row.get('username'),
-                    email=row.get('email'),
-                    bio=row.get('bio'),
-                    first_name=row.get('first_name'),
-                    last_name=row.get('last_name'),
-                    is_superuser=row.get('is_superuser'),
-                    is_staff=row.get('is_staff'),
-                    is_active=row.get('is_active'),
-                ))
-            model.objects.bulk_create(users_list)
-        return True
+            yield from csv.DictReader(csvfile)
+
+    def __bulk_create(self, model, objects):
+        # Каждая таблица пишется пакетами в своей транзакции
+        # (точке сохранения, если загрузка идёт внутри run).
+        with transaction.atomic():
+            count = bulk_insert(
+                model, objects, self.batch_size, self.ignore_conflicts)
+        logging.debug(f'В модель {model.__name__} записано {count} строк')
+        return count
+
+    def __load_data_users(self, model, key):
+        return self.__bulk_create(model, (
+            model(
+                id=row.get('id'),
+                username=row.get('username'),
+                email=row.get('email'),
+                bio=row.get('bio'),
+                first_name=row.get('first_name'),
+                last_name=row.get('last_name'),
+                is_superuser=row.get('is_superuser'),
+                is_staff=row.get('is_staff'),
+                is_active=row.get('is_active'),
+            ) for row in self.__read_rows(key)
+        ))
 
     def __load_data_review(self, model, key):
-        users_list = []
+        return self.__bulk_create(model, (
+            model(
+                id=row.get('id'),
+                text=row.get('text'),
+                score=row.get('score'),
+                pub_date=row.get('pub_date'),
+                author_id=row.get('author'),
+                title_id=row.get('title_id'),
+            ) for row in self.__read_rows(key)
+        ))
+
+    def __load_data_comments(self, model, key):
+        return self.__bulk_create(model, (
+            model(
+                id=row.get('id'),
+                text=row.get('text'),
+                pub_date=row.get('pub_date'),
+                author_id=row.get('author'),
+                review_id=row.get('review_id'),
+            ) for row in self.__read_rows(key)
+        ))
+
+    def __load_data_rows(self, model, key):
         with open(PATH_FILES.get(key), newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                users_list.append(model(
-                    id=row.get('id'),
-                    text=row.get('text'),
-                    score=row.get('score'),
-                    pub_date=row.get('pub_date'),
-                    author_id=row.get('author'),
-                    title_id=row.get('title_id'),
-                ))
-                model.objects.bulk_create([
-                    model(
-                        id=row.get('id'),
-                        text=row.get('text'),
-                        score=row.get('score'),
-                        pub_date=row.get('pub_date'),
-                        author_id=row.get('author'),
-                        title_id=row.get('title_id'),
-                    )
-                ])
-        return True
+            reader = csv.reader(csvfile)
+            next(reader, None)
+            return self.__bulk_create(model, (model(*row) for row in reader))
+
+    def __load_table(self, model):
+        key = MODELS[model]
+        logging.debug(
+            f'Загуражем данные из {PATH_FILES.get(key)}'
+            f'в модель {model.__name__}')
+        loaders = {
+            'users': self.__load_data_users,
+            'review': self.__load_data_review,
+            'comments': self.__load_data_comments,
+        }
+        started = time.monotonic()
+        count = loaders.get(key, self.__load_data_rows)(model, key)
+        self.report(
+            f'{model.__name__}: {count} строк '
+            f'за {time.monotonic() - started:.2f} с'
+        )
+
+    def __load_table_in_thread(self, model):
+        # У потока своё соединение с БД, его нужно закрыть по завершении.
+        try:
+            self.__load_table(model)
+        finally:
+            connection.close()
 
     def __load_data(self):
-        for model, key, in MODELS.items():
-            logging.debug(
-                f'Загуражем данные из {PATH_FILES.get(key)}'
-                f'в модель {model.__name__}')
-            if key == 'users':
-                self.__load_data_users(model, key)
-                continue
-            if key == 'review':
-                self.__load_data_review(model, key)
-                continue
-            with open(PATH_FILES.get(key), newline='') as csvfile:
-                reader = csv.reader(csvfile)
-                data = [
-                    model(*row) for idx, row in enumerate(reader) if idx != 0]
-                model.objects.bulk_create(data)
+        for model in MODELS:
+            self.__load_table(model)
         logging.debug('Все данные успешно загружены в БД')
 
+    def __load_data_parallel(self):
+        """Загружает независимые таблицы одновременно.
+
+        Таблица ставится в очередь пула, как только загружены все таблицы,
+        на которые ссылаются её внешние ключи.
+        """
+        pending = model_dependencies(MODELS)
+        loaded = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for model, dependencies in list(pending.items()):
+                    if dependencies <= loaded:
+                        running[executor.submit(
+                            self.__load_table_in_thread, model)] = model
+                        del pending[model]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    loaded.add(running.pop(future))
+        logging.debug('Все данные успешно загружены в БД')
+
+    def __finish(self):
+        # bulk_create не отправляет сигналы, агрегаты считаем заново
+        Title.objects.rebuild_ratings()
+        logging.debug('Рейтинги произведений пересчитаны')
+        catalog_cache.bump_on_commit('categories', 'genres', 'titles')
+
     def run(self):
-        self.__clean_data()
-        self.__load_data()
+        if self.workers > 1 and connection.vendor == 'sqlite':
+            logging.warning(
+                'SQLite не поддерживает параллельную запись, '
+                'таблицы загружаются последовательно')
+            self.workers = 1
+        if self.workers > 1:
+            # Потоки работают в своих соединениях, поэтому каждая таблица
+            # фиксируется отдельной транзакцией.
+            with transaction.atomic():
+                clean_tables()
+            self.__load_data_parallel()
+            with transaction.atomic():
+                self.__finish()
+            return
+        with transaction.atomic():
+            clean_tables()
+            self.__load_data()
+            self.__finish()
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwargs):
-        data = Data()
-        load_data = LoadData()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Потоковая загрузка порциями без подготовки файлов',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Число строк csv, читаемых за раз в потоковом режиме',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Число строк в одном INSERT',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Число потоков для одновременной загрузки независимых таблиц',
+        )
+        parser.add_argument(
+            '--ignore-conflicts',
+            action='store_true',
+            help='Пропускать строки, нарушающие ограничения уникальности',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help=(
+                'Не очищать таблицы, а добавлять новые и обновлять '
+                'изменившиеся строки (потоковый режим)'
+            ),
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help='В инкрементальном режиме удалять строки, которых нет в csv',
+        )
+
+    def handle(self, *args, **options):
         try:
+            if options['stream'] or options['incremental']:
+                StreamLoadData(
+                    PATH_FILES,
+                    chunk_size=options['chunk_size'],
+                    batch_size=options['batch_size'],
+                    ignore_conflicts=options['ignore_conflicts'],
+                    incremental=options['incremental'],
+                    delete_missing=options['delete_missing'],
+                    report=self.stdout.write,
+                ).run()
+                return
+            data = Data()
+            load_data = LoadData(
+                batch_size=options['batch_size'],
+                ignore_conflicts=options['ignore_conflicts'],
+                workers=options['workers'],
+                report=self.stdout.write,
+            )
             data.run()
             load_data.run()
         except Exception as exc:
@@ -0,0 +1,39 @@
+import time
+from pathlib import Path
+
+from core.snapshot import SnapshotError, SnapshotReader
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Заменяет данные таблиц загрузки содержимым снимка '
+        'из dump_snapshot'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=Path(settings.PATH_DATA, 'snapshot'),
+            help='Каталог снимка',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Число строк в одном INSERT (кроме PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            loaded = SnapshotReader(
+                options['path'], batch_size=options['batch_size']).run()
+        except SnapshotError as exc:
+            raise CommandError(exc)
+        for table, rows in loaded.items():
+            self.stdout.write(f'{table}: {rows} строк')
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок загружен за {time.monotonic() - started:.2f} с'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые рейтинги произведений по отзывам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        drift = list(Title.objects.with_rating_drift().values_list(
+            'pk', 'rating_sum', 'rating_count',
+            'computed_rating_sum', 'computed_rating_count'))
+        for pk, stored_sum, stored_count, real_sum, real_count in drift:
+            self.stdout.write(
+                f'Произведение {pk}: сохранено {stored_sum}/{stored_count}, '
+                f'по отзывам {real_sum}/{real_count}'
+            )
+        if options['check']:
+            if drift:
+                raise CommandError(
+                    f'Расхождение рейтинга у {len(drift)} произведений')
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны рейтинги {updated} произведений, '
+            f'исправлено расхождений: {len(drift)}'
+        ))
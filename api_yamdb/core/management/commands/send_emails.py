@@ -0,0 +1,47 @@
+import time
+
+from core.mail import OutboxWorker
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutboxEmail'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Число писем, отправляемых через одно соединение',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить всё, что готово к отправке, и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(batch_size=options['batch_size'])
+        purged_at = 0
+        try:
+            while True:
+                if time.monotonic() - purged_at > 3600:
+                    worker.purge_sent(settings.EMAIL_OUTBOX_KEEP_SENT_DAYS)
+                    purged_at = time.monotonic()
+                sent, failed = worker.run_once()
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено {sent}, с ошибкой {failed}')
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
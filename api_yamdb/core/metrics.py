@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from prometheus_client import (CollectorRegistry, Counter, Histogram,
+                               generate_latest)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса, их пополняет record_query."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.db_time = 0
+        self.serializer_time = 0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Асинхронное представление может выполнять запросы из
+            # нескольких потоков одновременно.
+            with self.lock:
+                self.queries += 1
+                self.db_time += elapsed
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper, который учитывает запрос в метриках текущего запроса.
+
+    Метрики берутся из контекста, поэтому учитываются и запросы из
+    потоков, в которых асинхронные представления обращаются к базе.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsRegistry:
+    """Метрики представлений в prometheus_client.
+
+    Если задан PROMETHEUS_MULTIPROC_DIR (его выставляет gunicorn.conf.py),
+    каждый процесс gunicorn пишет значения в свои файлы в этом каталоге,
+    а render суммирует файлы всех процессов: ответ не зависит от того,
+    какой процесс принял запрос. Без каталога значения живут в памяти
+    процесса.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.registry = CollectorRegistry()
+        self.duration = Histogram(
+            'yamdb_request_duration_seconds', 'Время обработки запроса',
+            ['view'], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.queries = Counter(
+            'yamdb_db_queries', 'Число запросов к БД',
+            ['view'], registry=self.registry)
+        self.db_time = Counter(
+            'yamdb_db_query_seconds', 'Время выполнения запросов к БД',
+            ['view'], registry=self.registry)
+        self.serializer_time = Counter(
+            'yamdb_serializer_seconds', 'Время сериализации ответа',
+            ['view'], registry=self.registry)
+        self.over_budget = Counter(
+            'yamdb_query_budget_exceeded',
+            'Запросы, превысившие бюджет запросов к БД',
+            ['view'], registry=self.registry)
+
+    def observe(self, view, latency, metrics, over_budget):
+        self.duration.labels(view).observe(latency)
+        self.queries.labels(view).inc(metrics.queries)
+        self.db_time.labels(view).inc(metrics.db_time)
+        self.serializer_time.labels(view).inc(metrics.serializer_time)
+        if over_budget:
+            self.over_budget.labels(view).inc()
+
+    def value(self, name, view):
+        return self.registry.get_sample_value(name, {'view': view})
+
+    def collect_registry(self, registries=()):
+        # В многопроцессном режиме файлы каталога содержат и метрики
+        # остальных реестров процесса (core.pool.pool_stats).
+        registry = CollectorRegistry(auto_describe=False)
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            MultiProcessCollector(registry)
+            return registry
+        for source in (self.registry, *registries):
+            registry.register(source)
+        return registry
+
+    def render(self, cache_stats=None, registries=()):
+        lines = [generate_latest(
+            self.collect_registry(registries)).decode().rstrip()]
+        if cache_stats:
+            lines.append(
+                '# HELP yamdb_catalog_cache_requests_total '
+                'Обращения к кэшу каталога')
+            lines.append('# TYPE yamdb_catalog_cache_requests_total counter')
+            for view, outcomes in sorted(cache_stats.items()):
+                for outcome, value in sorted(outcomes.items()):
+                    lines.append(
+                        'yamdb_catalog_cache_requests_total'
+                        f'{{view="{view}",outcome="{outcome}"}} {value}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def view_name(request):
+    """Имя вида «TitleViewSet.list» для разрешённого представления."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match._func_path
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{view_class.__name__}.{action}'
+    return view_class.__name__
+
+
+class MetricsMiddleware:
+    """Время запроса, число и время запросов к БД, время сериализации.
+
+    Если число запросов к БД превышает бюджет из QUERY_BUDGETS (или
+    QUERY_BUDGET_DEFAULT), пишется предупреждение. Работает и под WSGI,
+    и под ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.observe(request, time.perf_counter() - started, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.observe(request, time.perf_counter() - started, metrics)
+        return response
+
+    def observe(self, request, latency, metrics):
+        view = view_name(request)
+        budget = settings.QUERY_BUDGETS.get(
+            view, settings.QUERY_BUDGET_DEFAULT)
+        over_budget = budget is not None and metrics.queries > budget
+        if over_budget:
+            logger.warning(
+                '%s: %d запросов к БД при бюджете %d (%s %s)',
+                view, metrics.queries, budget, request.method, request.path,
+            )
+        registry.observe(view, latency, metrics, over_budget)
+
+
+class MeasuredSerializerMixin:
+    """Добавляет время to_representation к метрикам запроса.
+
+    Учитывается только внешний сериализатор: вложенные сериализаторы
+    выполняются внутри него.
+    """
+
+    def to_representation(self, instance):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - started
@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку командой send_emails."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    to_email = models.EmailField('Получатель')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to_email}: {self.subject}'
@@ -0,0 +1,191 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+
+
+class PoolStats:
+    """Статистика постоянных соединений по алиасам баз в prometheus_client.
+
+    Соединение занято от начала запроса до его окончания, между
+    запросами оно простаивает. Каждый поток процесса gunicorn держит не
+    больше одного соединения с каждой базой. Как и метрики запросов
+    (core.metrics.MetricsRegistry), при PROMETHEUS_MULTIPROC_DIR значения
+    суммируются по всем процессам, а число активных и простаивающих
+    соединений — только по живым.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.registry = CollectorRegistry()
+        self.checkout_time = Histogram(
+            'yamdb_db_checkout_seconds',
+            'Получение соединения в начале запроса',
+            ['alias'], buckets=CHECKOUT_BUCKETS, registry=self.registry)
+        self.checkouts = Counter(
+            'yamdb_db_checkouts',
+            'Выдачи соединений: переиспользованное или новое',
+            ['alias', 'connection'], registry=self.registry)
+        self.connect_time = Counter(
+            'yamdb_db_connect_seconds', 'Время установки новых соединений',
+            ['alias'], registry=self.registry)
+        self.connections = Gauge(
+            'yamdb_db_connections', 'Открытые соединения',
+            ['alias', 'state'], multiprocess_mode='livesum',
+            registry=self.registry)
+        self.opened_total = Counter(
+            'yamdb_db_connections_opened', 'Открытые соединения',
+            ['alias'], registry=self.registry)
+        self.closed_total = Counter(
+            'yamdb_db_connections_closed', 'Закрытые соединения по причинам',
+            ['alias', 'reason'], registry=self.registry)
+
+    def opened(self, alias):
+        self.opened_total.labels(alias).inc()
+        self.connections.labels(alias, 'idle').inc()
+
+    def closed(self, alias, reason):
+        self.closed_total.labels(alias, reason).inc()
+        self.connections.labels(alias, 'idle').dec()
+
+    def checkout(self, alias, wait, reused):
+        self.connections.labels(alias, 'idle').dec()
+        self.connections.labels(alias, 'active').inc()
+        self.checkouts.labels(alias, 'reused' if reused else 'new').inc()
+        self.checkout_time.labels(alias).observe(wait)
+        if not reused:
+            self.connect_time.labels(alias).inc(wait)
+
+    def checkin(self, alias):
+        self.connections.labels(alias, 'active').dec()
+        self.connections.labels(alias, 'idle').inc()
+
+    def value(self, name, **labels):
+        return self.registry.get_sample_value(name, labels) or 0
+
+
+pool_stats = PoolStats()
+
+
+def close_reason(connection):
+    if connection.close_at is not None and (
+            time.monotonic() >= connection.close_at):
+        return 'max_age'
+    return 'unusable'
+
+
+def track_closed(alias, connection):
+    """Учитывает соединения, закрытые с прошлой отметки.
+
+    Django закрывает устаревшие и сломанные соединения сам, в
+    close_old_connections, поэтому закрытие видно только по отсутствию
+    соединения у обёртки.
+    """
+    is_open = connection.connection is not None
+    if connection.__dict__.get('pool_open') and not is_open:
+        pool_stats.closed(alias, close_reason(connection))
+    connection.pool_open = is_open
+
+
+def on_connection_created(sender, connection, **kwargs):
+    pool_stats.opened(connection.alias)
+    connection.pool_open = True
+
+
+def timed_connect(connection):
+    """Подменяет connect обёртки: новое соединение учитывается как выдача.
+
+    Соединение открывается при первом обращении к базе, поэтому запросы,
+    которым база не нужна (ответ из кэша, метрики), его не ждут.
+    """
+    connect = connection.connect
+
+    def wrapper():
+        started = time.perf_counter()
+        connect()
+        if connection.__dict__.get('pool_request') and not (
+                connection.__dict__.get('pool_active')):
+            connection.pool_active = True
+            pool_stats.checkout(
+                connection.alias, time.perf_counter() - started, False)
+
+    connection.connect = wrapper
+
+
+def needs_health_check(connection):
+    idle = settings.DB_HEALTH_CHECK_IDLE
+    if idle is None:
+        return False
+    released = connection.__dict__.get('pool_released_at')
+    return released is None or time.monotonic() - released >= idle
+
+
+def checkout_connections(**kwargs):
+    """Отмечает начало запроса для соединений процесса.
+
+    Выполняется после close_old_connections, который уже закрыл
+    соединения старше CONN_MAX_AGE. Оставшееся от прошлого запроса
+    соединение выдаётся сразу; если оно простаивало дольше
+    DB_HEALTH_CHECK_IDLE секунд, сначала проверяется is_usable() и при
+    обрыве закрывается, чтобы запрос открыл новое, а не упал. Новые
+    соединения открываются только при первом обращении к базе.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        track_closed(alias, connection)
+        # Уже подменённый connect (наш или тестовый) не трогаем.
+        if 'connect' not in connection.__dict__:
+            timed_connect(connection)
+        connection.pool_request = True
+        if connection.connection is None:
+            continue
+        started = time.perf_counter()
+        if needs_health_check(connection) and not connection.is_usable():
+            connection.close()
+            pool_stats.closed(alias, 'health_check')
+            connection.pool_open = connection.connection is not None
+            if not connection.pool_open:
+                continue
+        connection.pool_active = True
+        pool_stats.checkout(alias, time.perf_counter() - started, True)
+
+
+def release_connections(**kwargs):
+    """Возвращает соединения в простой по окончании запроса."""
+    for alias in connections:
+        connection = connections[alias]
+        connection.pool_request = False
+        if connection.__dict__.pop('pool_active', False):
+            pool_stats.checkin(alias)
+            connection.pool_released_at = time.monotonic()
+        track_closed(alias, connection)
+
+
+def render_pool_metrics():
+    """Размер пула и max_connections в формате Prometheus.
+
+    Статистику соединений из pool_stats.registry выдаёт вместе с
+    метриками запросов core.metrics.MetricsRegistry.render.
+    """
+    lines = [
+        '# HELP yamdb_db_pool_size '
+        'Соединений с базой на контейнер web: процессы × потоки',
+        '# TYPE yamdb_db_pool_size gauge',
+        f'yamdb_db_pool_size {settings.DB_POOL_SIZE}',
+    ]
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW max_connections')
+            max_connections = cursor.fetchone()[0]
+        lines.extend((
+            '# HELP yamdb_db_max_connections max_connections в PostgreSQL',
+            '# TYPE yamdb_db_max_connections gauge',
+            f'yamdb_db_max_connections {max_connections}',
+        ))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+# На реплике без новых записей pg_last_xact_replay_timestamp() стоит на
+# месте, поэтому совпадение принятого и применённого WAL считается
+# нулевым отставанием.
+PG_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+        THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+class RoutingState:
+    """Куда читать в текущем запросе и были ли в нём записи."""
+
+    def __init__(self):
+        self.read_db = None
+        self.wrote = False
+
+
+def replica_aliases():
+    return settings.DATABASE_REPLICAS
+
+
+class ReplicaPool:
+    """Выбирает реплику с допустимым отставанием.
+
+    Отставание каждой реплики проверяется не чаще, чем раз в
+    DATABASE_REPLICA_LAG_CHECK_INTERVAL секунд на процесс. Недоступная
+    реплика считается отстающей до следующей проверки.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+    def measure_lag(self, alias):
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(PG_LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+        except DatabaseError as error:
+            logger.warning(f'Реплика {alias} недоступна: {error}')
+            return None
+
+    def lag(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            checked = self.checked.get(alias)
+        if checked and now - checked[0] < (
+                settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL):
+            return checked[1]
+        lag = self.measure_lag(alias)
+        if lag is not None and lag > settings.DATABASE_REPLICA_MAX_LAG:
+            logger.warning(
+                f'Реплика {alias} отстаёт на {lag:.1f} с, '
+                'чтение идёт с основной базы')
+        with self.lock:
+            self.checked[alias] = (now, lag)
+        return lag
+
+    def choose(self):
+        healthy = []
+        for alias in replica_aliases():
+            lag = self.lag(alias)
+            if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG:
+                healthy.append(alias)
+        return random.choice(healthy) if healthy else None
+
+
+replica_pool = ReplicaPool()
+
+
+def sticky_key(user_id):
+    return f'routing:primary:{user_id}'
+
+
+def pin_to_primary(user):
+    """Чтения пользователя после его записи идут в основную базу.
+
+    Закрепление хранится в кэше default: следующий запрос может попасть
+    в другой процесс, поэтому с репликами кэш должен быть общим (это
+    проверяет core.cache.check_shared_cache при запуске).
+    """
+    cache.set(
+        sticky_key(user.pk), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and bool(cache.get(sticky_key(user.pk)))
+
+
+@contextmanager
+def primary_reads():
+    state = routing_state.get()
+    if state is None:
+        yield
+        return
+    read_db, state.read_db = state.read_db, None
+    try:
+        yield
+    finally:
+        state.read_db = read_db
+
+
+class ReplicaRouter:
+    """Чтение с реплики, выбранной для запроса ReplicaReadMixin.
+
+    Без выбранной реплики решение остаётся за Django, то есть чтение и
+    запись идут в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            return state.read_db
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        # Объект, прочитанный с реплики, сохраняется в основную базу.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replica_aliases():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Состояние маршрутизации на время запроса.
+
+    После успешного запроса с записью пользователь на
+    DATABASE_REPLICA_STICKY_SECONDS закрепляется за основной базой, чтобы
+    видеть свои изменения, пока они доходят до реплик.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.remember_write(request, response, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote:
+            await sync_to_async(self.remember_write)(request, response, state)
+        return response
+
+    def remember_write(self, request, response, state):
+        user = getattr(request, 'user', None)
+        if (state.wrote and response.status_code < 400
+                and user is not None and user.is_authenticated):
+            pin_to_primary(user)
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы представления читают с реплики.
+
+    Реплика выбирается после аутентификации, чтобы учесть закрепление
+    пользователя за основной базой.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = routing_state.get()
+        if (state is not None and request.method in SAFE_METHODS
+                and replica_aliases() and not is_pinned(request.user)):
+            state.read_db = replica_pool.choose()
@@ -0,0 +1,68 @@
+"""Профили gunicorn; читает gunicorn.conf.py до загрузки Django."""
+import multiprocessing
+import os
+
+# workers и threads — функции числа CPU. WEB_CONCURRENCY и
+# GUNICORN_THREADS из окружения имеют приоритет над профилем.
+PROFILES = {
+    # Один процесс без предзагрузки: быстрый старт для отладки.
+    'development': {
+        'worker_class': 'sync',
+        'workers': lambda cpus: 1,
+        'threads': lambda cpus: 1,
+        'preload_app': False,
+    },
+    # Синхронные воркеры по классической формуле 2 × CPU + 1.
+    'production': {
+        'worker_class': 'sync',
+        'workers': lambda cpus: 2 * cpus + 1,
+        'threads': lambda cpus: 1,
+        'preload_app': True,
+    },
+    # Меньше процессов, по несколько потоков: меньше памяти на процесс,
+    # пока потоки ждут базу.
+    'threaded': {
+        'worker_class': 'gthread',
+        'workers': lambda cpus: cpus + 1,
+        'threads': lambda cpus: 4,
+        'preload_app': True,
+    },
+    # api_yamdb.asgi под uvicorn, по процессу на CPU. Потоки —
+    # пул для работы с базой (core.utils.database_executor).
+    'async': {
+        'worker_class': 'uvicorn.workers.UvicornWorker',
+        'workers': lambda cpus: cpus,
+        'threads': lambda cpus: 4,
+        'preload_app': True,
+    },
+}
+DEFAULT_PROFILE = 'production'
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def server_options(profile=None, cpus=None, environ=None):
+    """Настройки gunicorn для профиля с учётом окружения."""
+    environ = os.environ if environ is None else environ
+    profile = profile or environ.get('GUNICORN_PROFILE', DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        raise ProfileError(
+            f'Неизвестный профиль gunicorn {profile!r}, '
+            f'доступны: {", ".join(PROFILES)}')
+    cpus = cpus or multiprocessing.cpu_count()
+    spec = PROFILES[profile]
+    workers = int(environ.get('WEB_CONCURRENCY') or spec['workers'](cpus))
+    threads = int(environ.get('GUNICORN_THREADS') or spec['threads'](cpus))
+    worker_class = spec['worker_class']
+    if worker_class == 'sync' and threads > 1:
+        # gunicorn сам переключает sync на gthread при threads > 1.
+        worker_class = 'gthread'
+    return {
+        'profile': profile,
+        'worker_class': worker_class,
+        'workers': workers,
+        'threads': threads,
+        'preload_app': spec['preload_app'],
+    }
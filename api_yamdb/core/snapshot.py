@@ -0,0 +1,218 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core.cache import catalog_cache
+from core.importer import clean_tables, model_dependencies, reset_sequences
+from core.utils import chunked
+from django.db import connection, transaction
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+SNAPSHOT_MODELS = (Genre, Category, Title, TitleGenre, User, Review, Comment)
+SNAPSHOT_VERSION = 1
+MANIFEST = 'manifest.json'
+# Явная метка NULL отличает его от пустой строки и в COPY, и в модуле csv.
+NULL = '\\N'
+COPY_OPTIONS = f"FORMAT csv, HEADER, NULL '{NULL}'"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def dependency_order(models):
+    """Модели в порядке, при котором родители загружаются раньше детей."""
+    pending = model_dependencies(models)
+    ordered = []
+    while pending:
+        ready = [
+            model for model in models
+            if model in pending and not pending[model] & pending.keys()
+        ]
+        if not ready:
+            raise SnapshotError('Циклическая зависимость между таблицами')
+        for model in ready:
+            ordered.append(model)
+            del pending[model]
+    return ordered
+
+
+def table_columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_sql(model, direction):
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in table_columns(model))
+    stream = 'STDOUT' if direction == 'TO' else 'STDIN'
+    return (
+        f'COPY {quote(model._meta.db_table)} ({columns}) '
+        f'{direction} {stream} WITH ({COPY_OPTIONS})'
+    )
+
+
+def format_value(value):
+    return NULL if value is None else value
+
+
+class SnapshotWriter:
+    """Выгружает таблицы в сжатые csv в формате COPY и пишет манифест.
+
+    На PostgreSQL таблица выгружается одной командой COPY TO, на других
+    СУБД строки читаются курсором и пишутся модулем csv в том же формате.
+    """
+
+    def __init__(self, path, chunk_size=10000):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+
+    def dump_table(self, model, path):
+        with gzip.open(path, 'wb', compresslevel=1) as f:
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(copy_sql(model, 'TO'), f)
+                    return cursor.rowcount
+            text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(table_columns(model))
+            attnames = [field.attname for field in model._meta.concrete_fields]
+            rows = model.objects.order_by('pk').values_list(
+                *attnames).iterator(chunk_size=self.chunk_size)
+            count = 0
+            for row in rows:
+                writer.writerow([format_value(value) for value in row])
+                count += 1
+            text.flush()
+            text.detach()
+            return count
+
+    def run(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tables = []
+        outermost = not connection.in_atomic_block
+        with transaction.atomic():
+            if outermost and connection.vendor == 'postgresql':
+                # Все таблицы выгружаются из одного снимка данных.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ '
+                        'READ ONLY')
+            for model in SNAPSHOT_MODELS:
+                file_name = f'{model._meta.db_table}.csv.gz'
+                rows = self.dump_table(model, self.path / file_name)
+                tables.append({
+                    'model': model._meta.label,
+                    'table': model._meta.db_table,
+                    'columns': table_columns(model),
+                    'rows': rows,
+                    'file': file_name,
+                    'sha256': file_checksum(self.path / file_name),
+                })
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'tables': tables,
+        }
+        with open(self.path / MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+
+class SnapshotReader:
+    """Восстанавливает таблицы из снимка в порядке зависимостей по FK.
+
+    Перед загрузкой проверяются версия формата, состав столбцов и
+    контрольные суммы всех файлов, чтобы не очищать базу зря.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+
+    def read_manifest(self):
+        try:
+            with open(self.path / MANIFEST, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise SnapshotError(f'Не найден {self.path / MANIFEST}')
+        if manifest.get('version') != SNAPSHOT_VERSION:
+            raise SnapshotError(
+                f'Неподдерживаемая версия снимка: {manifest.get("version")}')
+        return manifest
+
+    def verify(self, manifest):
+        tables = {table['table']: table for table in manifest['tables']}
+        for model in SNAPSHOT_MODELS:
+            table = tables.get(model._meta.db_table)
+            if table is None:
+                raise SnapshotError(
+                    f'В снимке нет таблицы {model._meta.db_table}')
+            if table['columns'] != table_columns(model):
+                raise SnapshotError(
+                    f'Столбцы {table["table"]} не совпадают со схемой базы')
+            if file_checksum(self.path / table['file']) != table['sha256']:
+                raise SnapshotError(
+                    f'Неверная контрольная сумма {table["file"]}')
+        return tables
+
+    def load_table(self, model, path):
+        with gzip.open(path, 'rb') as f, connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.copy_expert(copy_sql(model, 'FROM'), f)
+                return cursor.rowcount
+            reader = csv.reader(io.TextIOWrapper(
+                f, encoding='utf-8', newline=''))
+            next(reader)
+            fields = model._meta.concrete_fields
+            quote = connection.ops.quote_name
+            sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+                quote(model._meta.db_table),
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join(['%s'] * len(fields)),
+            )
+            count = 0
+            for rows in chunked(reader, self.batch_size):
+                cursor.executemany(sql, [
+                    [
+                        None if value == NULL else field.get_db_prep_save(
+                            field.to_python(value), connection)
+                        for field, value in zip(fields, row)
+                    ]
+                    for row in rows
+                ])
+                count += len(rows)
+            return count
+
+    def run(self):
+        manifest = self.read_manifest()
+        tables = self.verify(manifest)
+        loaded = {}
+        with transaction.atomic():
+            clean_tables()
+            for model in dependency_order(SNAPSHOT_MODELS):
+                table = tables[model._meta.db_table]
+                loaded[table['table']] = self.load_table(
+                    model, self.path / table['file'])
+                if loaded[table['table']] != table['rows']:
+                    raise SnapshotError(
+                        f'{table["table"]}: загружено '
+                        f'{loaded[table["table"]]} строк вместо '
+                        f'{table["rows"]}'
+                    )
+            reset_sequences(list(SNAPSHOT_MODELS))
+            catalog_cache.bump_on_commit('categories', 'genres', 'titles')
+        return loaded
@@ -1,7 +1,15 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
+from itertools import islice
+
+from core.mail import enqueue_email
+from core.pool import checkout_connections, release_connections
 from django.conf import settings
-from django.core import mail
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator, validate_email
+from django.db import close_old_connections
 from django.utils.regex_helper import _lazy_re_compile
 from rest_framework import mixins, viewsets
 
@@ -28,15 +36,62 @@ def username_is_valid(username):
         return False
 
 
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@lru_cache(maxsize=None)
+def database_executor():
+    """Пул потоков для работы с базой из асинхронных представлений.
+
+    Каждый поток держит своё соединение, поэтому пул ограничен
+    GUNICORN_THREADS: столько же соединений на процесс закладывает
+    DB_POOL_SIZE. Пул создаётся при первом вызове, уже в воркере.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.GUNICORN_THREADS, thread_name_prefix='db')
+
+
+def database_sync_to_async(func):
+    """Выполняет синхронную работу с базой в пуле database_executor.
+
+    В отличие от sync_to_async по умолчанию вызовы не выстраиваются в
+    очередь к одному потоку и идут параллельно, каждый поток со своим
+    соединением. Сигналы запроса до этих потоков не доходят, поэтому
+    то, что под WSGI делают их обработчики, — закрытие устаревших
+    соединений и выдача их в статистике пула — выполняется здесь, до и
+    после вызова.
+    """
+    @wraps(func)
+    def run(*args, **kwargs):
+        close_old_connections()
+        checkout_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+            release_connections()
+
+    @wraps(func)
+    async def call(*args, **kwargs):
+        # Контекст копируется, чтобы запросы учитывались в метриках
+        # текущего запроса (core.metrics.current_metrics).
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            database_executor(), partial(context.run, run, *args, **kwargs))
+    return call
+
+
 def email_msg(to_email, code):
+    """Ставит письмо с кодом в очередь; отправляет команда send_emails."""
     subject = 'Confirmation code for YaMDB'
-    to = to_email
     text_content = f'Confirmation code for API YaMDB. {code}'
-    mail.send_mail(
-        subject, text_content,
-        settings.EMAIL_NO_REPLY, [to],
-        fail_silently=False
-    )
+    enqueue_email(subject, text_content, to_email)
 
 
 class CreateListDestroyViewsSet(
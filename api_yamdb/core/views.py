@@ -0,0 +1,36 @@
+import hmac
+
+from core.cache import catalog_cache
+from core.mail import render_queue_metrics
+from core.metrics import registry
+from core.pool import pool_stats, render_pool_metrics
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CACHED_VIEWS = ('categories', 'genres', 'titles')
+
+
+def metrics_allowed(request):
+    """С METRICS_TOKEN — по токену, иначе только для INTERNAL_IPS.
+
+    За прокси REMOTE_ADDR — адрес nginx, поэтому в docker-compose
+    доступ даёт токен, а nginx закрывает /internal/ снаружи.
+    """
+    if settings.METRICS_TOKEN:
+        return hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {settings.METRICS_TOKEN}')
+    return request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+
+
+def metrics(request):
+    """Метрики в текстовом формате Prometheus."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(
+            catalog_cache.stats(CACHED_VIEWS), [pool_stats.registry])
+        + render_queue_metrics()
+        + render_pool_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,89 @@
+import logging
+import time
+
+from django.conf import settings
+from django.urls import get_resolver, reverse
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Адреса, разбор которых прогревается до первого запроса.
+WARM_UP_PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/1/',
+    '/api/v1/titles/1/reviews/',
+    '/api/v1/titles/1/reviews/1/comments/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+    '/api/v1/users/me/',
+    '/api/v1/auth/token/',
+)
+
+
+def warm_up_urls():
+    resolver = get_resolver()
+    for path in WARM_UP_PATHS:
+        resolver.resolve(path)
+    reverse('titles-list')
+
+
+def warm_up_serializers():
+    # Поля ModelSerializer строятся лениво по метаданным моделей при
+    # первом обращении к fields в каждом процессе.
+    from api.v1 import serializers
+    for serializer_class in (
+        serializers.UserSerializer,
+        serializers.CategorySerializer,
+        serializers.GenreSerializer,
+        serializers.TitleSerializerGet,
+        serializers.TitleSerializer,
+        serializers.ReviewSerializer,
+        serializers.CommentSerializer,
+    ):
+        serializer_class().fields
+
+
+def warm_up_filters():
+    from api.v1.filters import TitleFilter
+    TitleFilter().form
+
+
+def warm_up_drf():
+    from rest_framework.settings import api_settings
+    for name in (
+        'DEFAULT_RENDERER_CLASSES',
+        'DEFAULT_PARSER_CLASSES',
+        'DEFAULT_AUTHENTICATION_CLASSES',
+        'DEFAULT_PERMISSION_CLASSES',
+        'DEFAULT_PAGINATION_CLASS',
+        'DEFAULT_FILTER_BACKENDS',
+        'DEFAULT_SCHEMA_CLASS',
+    ):
+        getattr(api_settings, name)
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('Not found.')
+    translation.deactivate()
+
+
+WARM_UP_STEPS = (
+    ('urls', warm_up_urls),
+    ('serializers', warm_up_serializers),
+    ('filters', warm_up_filters),
+    ('drf', warm_up_drf),
+)
+
+
+def warm_up():
+    """Строит ленивые структуры Django и DRF до первого запроса.
+
+    Не обращается к базе, поэтому безопасно вызывается в мастере gunicorn
+    перед fork: воркеры получают готовые структуры через copy-on-write.
+    Возвращает длительность шагов в миллисекундах.
+    """
+    timings = {}
+    for name, step in WARM_UP_STEPS:
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(f'Прогрев за {sum(timings.values()):.1f} мс: {timings}')
+    return timings
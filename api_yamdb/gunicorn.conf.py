@@ -0,0 +1,75 @@
+"""Настройки gunicorn; профиль выбирается переменной GUNICORN_PROFILE.
+
+    gunicorn api_yamdb.wsgi:application -c gunicorn.conf.py
+    GUNICORN_PROFILE=async gunicorn api_yamdb.asgi:application \
+        -c gunicorn.conf.py
+"""
+import gc
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.server import server_options  # noqa: E402
+
+options = server_options()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = options['worker_class']
+workers = options['workers']
+threads = options['threads']
+preload_app = options['preload_app']
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Перезапуск воркеров ограничивает рост памяти; разброс не даёт всем
+# воркерам перезапуститься одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+# Сердцебиение воркеров — в памяти, а не на диске контейнера.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# DB_POOL_SIZE в настройках считается по итоговым значениям.
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(threads)
+# Метрики всех воркеров в общем каталоге (core.metrics.MetricsRegistry);
+# переменная должна быть задана до импорта prometheus_client.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', '/tmp/yamdb-metrics')
+
+
+def on_starting(server):
+    # Файлы прошлого запуска сложились бы с новыми значениями.
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def warm_up(server):
+    from core.warmup import warm_up
+    timings = warm_up()
+    server.log.info(f'Прогрев приложения: {timings}')
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    # Мастер прогревает приложение один раз, воркеры получают его через
+    # fork. Соединения с базой мастера воркерам не передаются.
+    warm_up(server)
+    from django.db import connections
+    connections.close_all()
+    # Объекты, созданные до fork, уходят из-под сборщика мусора: он не
+    # трогает их страницы, и они остаются общими между воркерами.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        warm_up(worker)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
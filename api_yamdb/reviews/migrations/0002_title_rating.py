@@ -0,0 +1,52 @@
+# Generated by Django 3.2 on 2026-10-18 18:18
+
+from django.db import migrations, models
+from django.db.models import (Count, ExpressionWrapper, IntegerField, OuterRef,
+                              Subquery, Sum)
+from django.db.models.functions import Coalesce
+
+
+def fill_title_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+
+    def aggregate(expression):
+        return Subquery(
+            reviews.annotate(value=expression).values('value'),
+            output_field=IntegerField()
+        )
+
+    Title.objects.update(
+        rating_sum=Coalesce(aggregate(Sum('score')), 0),
+        rating_count=Coalesce(aggregate(Count('id')), 0),
+        rating=aggregate(ExpressionWrapper(
+            Sum('score') / Count('id'), output_field=IntegerField())),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_title_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+INDEXES = {
+    'title_name_trgm_idx': 'name gin_trgm_ops',
+    'title_name_upper_trgm_idx': '(UPPER(name::text)) gin_trgm_ops',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # На других СУБД поиск работает через LIKE без специальных индексов.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON reviews_title USING gin ({expression})'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
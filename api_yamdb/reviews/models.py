@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, IntegerField,
+                              OuterRef, Q, Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce, Now
 
 User = get_user_model()
 
@@ -43,6 +46,68 @@ class Genre(models.Model):
         return f'Жанр: {self.name}'
 
 
+def _title_reviews_aggregate(expression):
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    return Subquery(
+        reviews.annotate(value=expression).values('value'),
+        output_field=IntegerField()
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+    def apply_rating_delta(self, title_id, score_delta, count_delta):
+        """Сдвигает сохранённый агрегат рейтинга одним UPDATE."""
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.filter(pk=title_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Case(
+                When(rating_count__lte=-count_delta, then=Value(None)),
+                default=ExpressionWrapper(
+                    rating_sum / rating_count, output_field=IntegerField()),
+            ),
+            version=F('version') + 1,
+            modified=Now(),
+        )
+
+    def touch(self):
+        """Отмечает изменение произведения или его отзывов и комментариев."""
+        return self.update(version=F('version') + 1, modified=Now())
+
+    def with_computed_rating(self):
+        """Аннотирует агрегаты, посчитанные заново по таблице отзывов."""
+        return self.annotate(
+            computed_rating_sum=Coalesce(
+                _title_reviews_aggregate(Sum('score')), 0),
+            computed_rating_count=Coalesce(
+                _title_reviews_aggregate(Count('id')), 0),
+        )
+
+    def with_rating_drift(self):
+        return self.with_computed_rating().filter(
+            ~Q(rating_sum=F('computed_rating_sum'))
+            | ~Q(rating_count=F('computed_rating_count'))
+        )
+
+    def rebuild_ratings(self):
+        """Пересчитывает агрегаты рейтинга с нуля."""
+        return self.update(
+            rating_sum=Coalesce(_title_reviews_aggregate(Sum('score')), 0),
+            rating_count=Coalesce(_title_reviews_aggregate(Count('id')), 0),
+            rating=_title_reviews_aggregate(
+                ExpressionWrapper(
+                    Sum('score') / Count('id'), output_field=IntegerField())
+            ),
+            version=F('version') + 1,
+            modified=Now(),
+        )
+
+
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=256,
@@ -65,6 +130,34 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='Категория произведения')
     genre = models.ManyToManyField(Genre, through='TitleGenre')
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False
+    )
+    modified = models.DateTimeField(
+        'дата изменения',
+        auto_now=True
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
@@ -73,6 +166,28 @@ class Title(models.Model):
     def __str__(self):
         return f'Произведение: {self.name}'
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Агрегаты рейтинга пишут только apply_rating_delta и
+        # rebuild_ratings: значения в экземпляре могли устареть.
+        update_fields = kwargs.pop('update_fields', None)
+        if update_fields is None:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+            ]
+        kwargs['update_fields'] = [
+            name for name in update_fields
+            if name not in (*RATING_FIELDS, 'version', 'modified')
+        ] + ['version', 'modified']
+        # Версия растёт в UPDATE, как в touch: у устаревшего экземпляра
+        # или при параллельных сохранениях номер не повторяется.
+        self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=('version', 'modified', *RATING_FIELDS))
+
 
 class TitleGenre(models.Model):
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
@@ -130,11 +245,33 @@ class Review(models.Model):
                 fields=('title', 'author',),
                 name='unique review'
             )]
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_feed_idx'
+            ),
+        ]
         ordering = ('-pub_date',)
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        # Оценка и произведение на момент загрузки из БД нужны, чтобы
+        # при сохранении сдвинуть агрегат рейтинга на разницу.
+        self._loaded_score = self.__dict__.get('score')
+        self._loaded_title_id = self.__dict__.get('title_id')
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -164,6 +301,12 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_feed_idx'
+            ),
+        ]
         ordering = ('-pub_date',)
 
     def __str__(self):
@@ -0,0 +1,89 @@
+from core.cache import catalog_cache
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .models import Category, Comment, Genre, Review, Title, TitleGenre
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating_on_save(sender, instance, created, **kwargs):
+    loaded_score = getattr(instance, '_loaded_score', None)
+    loaded_title_id = getattr(instance, '_loaded_title_id', None)
+    if created:
+        Title.objects.apply_rating_delta(instance.title_id, instance.score, 1)
+    elif loaded_score is not None and loaded_title_id == instance.title_id:
+        Title.objects.apply_rating_delta(
+            instance.title_id, instance.score - loaded_score, 0)
+    else:
+        Title.objects.filter(
+            pk__in={instance.title_id, loaded_title_id}
+        ).rebuild_ratings()
+    instance.remember_rating_state()
+
+
+@receiver(post_delete, sender=Review)
+def update_title_rating_on_delete(sender, instance, **kwargs):
+    Title.objects.apply_rating_delta(instance.title_id, -instance.score, -1)
+
+
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_categories_cache(sender, **kwargs):
+    catalog_cache.bump_on_commit('categories', 'titles')
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def invalidate_genres_cache(sender, **kwargs):
+    catalog_cache.bump_on_commit('genres', 'titles')
+
+
+@receiver((post_save, post_delete), sender=Title)
+def invalidate_title_cache(sender, instance, **kwargs):
+    catalog_cache.bump_on_commit('titles', f'title:{instance.pk}')
+
+
+@receiver((post_save, post_delete), sender=TitleGenre)
+@receiver((post_save, post_delete), sender=Review)
+def invalidate_title_children_cache(sender, instance, **kwargs):
+    catalog_cache.bump_on_commit('titles', f'title:{instance.title_id}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres_cache(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    title_ids = (pk_set or ()) if reverse else (instance.pk,)
+    catalog_cache.bump_on_commit(
+        'titles', *(f'title:{title_id}' for title_id in title_ids))
+
+
+@receiver((post_save, post_delete), sender=TitleGenre)
+def touch_title_on_genre_change(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genres_change(sender, instance, action, reverse,
+                                 pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        Title.objects.filter(pk__in=pk_set or ()).touch()
+    else:
+        Title.objects.filter(pk=instance.pk).touch()
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def touch_title_on_comment_change(sender, instance, **kwargs):
+    Title.objects.filter(reviews=instance.review_id).touch()
+
+
+@receiver((post_save, pre_delete), sender=Category)
+def touch_titles_on_category_change(sender, instance, **kwargs):
+    Title.objects.filter(category=instance).touch()
+
+
+@receiver((post_save, pre_delete), sender=Genre)
+def touch_titles_on_genre_change(sender, instance, **kwargs):
+    Title.objects.filter(genre=instance).touch()
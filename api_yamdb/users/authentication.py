@@ -0,0 +1,121 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Roles, User
+
+FINGERPRINT_CLAIM = 'fingerprint'
+FINGERPRINT_FIELDS = ('role', 'is_active', 'is_staff', 'is_superuser')
+REVOKED = 'revoked'
+
+
+def user_fingerprint(role, is_active, is_staff, is_superuser):
+    """Отпечаток полей, от которых зависят права.
+
+    Изменение любого из них отзывает выданные раньше токены. Смена
+    username токен не отзывает: права от него не зависят.
+    """
+    if not is_active:
+        return REVOKED
+    raw = f'{role}:{is_staff:d}:{is_superuser:d}'
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def fingerprint_key(user_id):
+    return f'auth:fingerprint:{user_id}'
+
+
+def remember_fingerprint(user):
+    cache.set(
+        fingerprint_key(user.pk),
+        user_fingerprint(
+            **{field: getattr(user, field) for field in FINGERPRINT_FIELDS}),
+        settings.AUTH_FINGERPRINT_CACHE_TTL,
+    )
+
+
+def revoke_tokens(user_id):
+    cache.set(
+        fingerprint_key(user_id), REVOKED,
+        settings.AUTH_FINGERPRINT_CACHE_TTL)
+
+
+def current_fingerprint(user_id):
+    """Отпечаток пользователя из кэша; при промахе — один запрос к БД."""
+    fingerprint = cache.get(fingerprint_key(user_id))
+    if fingerprint is None:
+        row = User.objects.filter(pk=user_id).values(
+            *FINGERPRINT_FIELDS).first()
+        fingerprint = user_fingerprint(**row) if row else REVOKED
+        cache.set(
+            fingerprint_key(user_id), fingerprint,
+            settings.AUTH_FINGERPRINT_CACHE_TTL)
+    return fingerprint
+
+
+def issue_access_token(user):
+    """Токен доступа с ролью пользователя и отпечатком для отзыва."""
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token[FINGERPRINT_CLAIM] = user_fingerprint(
+        **{field: getattr(user, field) for field in FINGERPRINT_FIELDS})
+    return token
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, восстановленный из утверждений токена без БД."""
+
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+    is_user = User.is_user
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', Roles.USER)
+
+    def as_model(self):
+        """Несохраняемый экземпляр User для внешних ключей и ответов.
+
+        username берётся из токена и после переименования остаётся
+        прежним, пока пользователь не получит новый токен.
+        """
+        return User(
+            id=self.id,
+            username=self.username,
+            role=self.role,
+            is_staff=self.is_staff,
+            is_superuser=self.is_superuser,
+        )
+
+
+def model_user(user):
+    return user.as_model() if isinstance(user, RoleTokenUser) else user
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """Доверяет ролям из токена и не загружает пользователя из БД.
+
+    Отзыв проверяется сравнением отпечатка из токена с текущим, который
+    хранится в кэше AUTH_FINGERPRINT_CACHE_TTL секунд. Кэш общий для
+    процессов gunicorn (core.cache.check_shared_cache), иначе отзыв
+    видел бы только процесс, изменивший пользователя. Токены без
+    отпечатка, выданные до его появления, проверяются по БД, как раньше.
+    """
+
+    def get_user(self, validated_token):
+        if FINGERPRINT_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = RoleTokenUser(validated_token)
+        if current_fingerprint(user.id) != validated_token[FINGERPRINT_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван', code='token_revoked')
+        return user
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import remember_fingerprint, revoke_tokens
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def refresh_user_fingerprint(sender, instance, **kwargs):
+    remember_fingerprint(instance)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
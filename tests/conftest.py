@@ -1,9 +1,46 @@
+import os
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """Прогоняем тесты с БД на SQLite в памяти.
+
+    В CI нет сервиса Postgres, поэтому настройки проекта используются
+    только если задана переменная окружения TEST_USE_PROJECT_DB.
+    """
+    if os.getenv('TEST_USE_PROJECT_DB'):
+        return
+    from django.conf import settings
+    from django.db import connections
+    # Отдельная база replica проверяет маршрутизацию чтения: данные в
+    # неё пишутся только явно, через using('replica').
+    settings.DATABASES = {
+        alias: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+        for alias in ('default', 'replica')
+    }
+    connections._settings = None
+    connections.__dict__.pop('settings', None)
+    for alias in ('default', 'replica'):
+        if hasattr(connections._connections, alias):
+            del connections[alias]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+    for cache in caches.all():
+        cache.clear()
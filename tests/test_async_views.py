@@ -0,0 +1,144 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from core.cache import catalog_cache
+from core.metrics import registry
+from core.pool import pool_stats
+from core.utils import database_executor
+from django.test import AsyncClient, Client
+from reviews.models import Category, Genre, Review, Title
+from users.authentication import issue_access_token
+from users.models import User
+
+
+@pytest.fixture
+def asgi_urls(settings):
+    settings.ROOT_URLCONF = 'api_yamdb.asgi_urls'
+
+
+@pytest.fixture
+def title():
+    title = Title.objects.create(
+        name='Произведение', year=2000, description='Описание',
+        category=Category.objects.create(name='Фильмы', slug='movie'))
+    title.genre.add(
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    )
+    author = User.objects.create(username='author', email='a@yamdb.ru')
+    Review.objects.create(title=title, author=author, text='Да', score=8)
+    return Title.objects.get(pk=title.pk)
+
+
+def asgi_request(method, path, headers=None, **kwargs):
+    # AsyncClient в Django 3.2 передаёт лишние аргументы как заголовки.
+    kwargs.update(headers or {})
+
+    async def send():
+        return await getattr(AsyncClient(), method)(path, **kwargs)
+    return async_to_sync(send)()
+
+
+# Асинхронные представления читают базу из других потоков, поэтому данные
+# должны быть закоммичены.
+@pytest.mark.django_db(transaction=True)
+class TestAsyncCatalog:
+
+    @pytest.mark.parametrize('path', [
+        '/api/v1/titles/',
+        '/api/v1/titles/?genre=drama&ordering=-year',
+        '/api/v1/titles/{pk}/',
+        '/api/v1/titles/{pk}/reviews/',
+    ])
+    def test_matches_wsgi(self, title, path, settings):
+        path = path.format(pk=title.pk)
+        expected = Client().get(path)
+        settings.ROOT_URLCONF = 'api_yamdb.asgi_urls'
+        response = asgi_request('get', path)
+        assert response.status_code == expected.status_code == 200
+        assert json.loads(response.content) == json.loads(expected.content)
+
+    def test_detail_fetches_title_and_genres_concurrently(
+            self, title, asgi_urls):
+        registry.reset()
+        response = asgi_request('get', f'/api/v1/titles/{title.pk}/')
+        assert response['X-Cache'] == 'MISS'
+        data = json.loads(response.content)
+        assert sorted(genre['slug'] for genre in data['genre']) == [
+            'comedy', 'drama']
+        assert data['category'] == {'name': 'Фильмы', 'slug': 'movie'}
+        assert data['rating'] == 8
+        # Отметка версии, затем произведение и жанры параллельно.
+        assert registry.value(
+            'yamdb_db_queries_total', 'api.v1.async_views.title_detail') == 3
+
+    def test_detail_uses_catalog_cache(self, title, asgi_urls):
+        path = f'/api/v1/titles/{title.pk}/'
+        expected = asgi_request('get', path)
+        registry.reset()
+        response = asgi_request('get', path)
+        assert response['X-Cache'] == 'HIT'
+        assert json.loads(response.content) == json.loads(expected.content)
+        assert registry.value(
+            'yamdb_db_queries_total', 'api.v1.async_views.title_detail') == 1
+        assert catalog_cache.stats(['titles'])['titles'] == {
+            'hits': 1, 'misses': 1}
+        title.name = 'Новое название'
+        title.save()
+        response = asgi_request('get', path)
+        assert response['X-Cache'] == 'MISS'
+        assert json.loads(response.content)['name'] == 'Новое название'
+
+    def test_database_calls_check_out_connections(self, title, asgi_urls):
+        pool_stats.reset()
+        asgi_request('get', f'/api/v1/titles/{title.pk}/')
+        # Отметка версии, произведение и жанры — каждый в своём вызове.
+        assert sum(
+            pool_stats.value(
+                'yamdb_db_checkouts_total', alias='default', connection=kind)
+            for kind in ('new', 'reused')
+        ) >= 3
+        assert pool_stats.value(
+            'yamdb_db_connections', alias='default', state='active') == 0
+
+    def test_detail_conditional_get(self, title, asgi_urls):
+        path = f'/api/v1/titles/{title.pk}/'
+        etag = asgi_request('get', path)['ETag']
+        response = asgi_request(
+            'get', path, headers={'if-none-match': etag})
+        assert response.status_code == 304
+        title.name = 'Новое название'
+        title.save()
+        assert asgi_request(
+            'get', path, headers={'if-none-match': etag}).status_code == 200
+
+    def test_detail_not_found(self, asgi_urls):
+        response = asgi_request('get', '/api/v1/titles/999/')
+        assert response.status_code == 404
+        assert json.loads(response.content) == {'detail': 'Not found.'}
+
+    def test_writes_go_through_viewset(self, title, asgi_urls):
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role='admin')
+        headers = {'authorization': f'Bearer {issue_access_token(admin)}'}
+        response = asgi_request(
+            'patch', f'/api/v1/titles/{title.pk}/',
+            data={'name': 'Новое название'},
+            content_type='application/json', headers=headers)
+        assert response.status_code == 200
+        assert Title.objects.get(pk=title.pk).name == 'Новое название'
+        response = asgi_request(
+            'post', '/api/v1/titles/',
+            data={'name': 'Второе', 'year': 2001, 'genre': ['drama'],
+                  'category': 'movie'},
+            content_type='application/json', headers=headers)
+        assert response.status_code == 201
+        assert asgi_request(
+            'post', '/api/v1/titles/', data={}).status_code == 401
+
+
+def test_database_executor_is_bounded(settings):
+    assert database_executor()._max_workers == settings.GUNICORN_THREADS
+    assert settings.DB_POOL_SIZE == (
+        settings.WEB_CONCURRENCY * settings.GUNICORN_THREADS)
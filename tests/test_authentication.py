@@ -0,0 +1,102 @@
+import pytest
+from core.cache import check_shared_cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Review, Title
+from users.authentication import RoleTokenUser
+from users.models import User
+
+
+@pytest.fixture
+def author():
+    return User.objects.create(
+        username='author', email='author@yamdb.ru', confirmation_code='code')
+
+
+def token_client(user):
+    response = APIClient().post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': user.confirmation_code,
+    })
+    assert response.status_code == 200
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["token"]}')
+    return client
+
+
+@pytest.mark.django_db
+class TestRoleJWTAuthentication:
+
+    def test_token_carries_role(self, author):
+        client = token_client(author)
+        token = AccessToken(client._credentials['HTTP_AUTHORIZATION'][7:])
+        user = RoleTokenUser(token)
+        assert (user.username, user.role) == ('author', 'user')
+        assert not user.is_admin and not user.is_moderator and user.is_user
+
+    def test_authenticated_write_skips_user_select(
+            self, author, django_assert_num_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = token_client(author)
+        # произведение + SAVEPOINT, INSERT, сдвиг рейтинга, RELEASE
+        with django_assert_num_queries(5) as context:
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отлично', 'score': 9},
+            )
+        assert response.status_code == 201
+        assert response.data['author'] == 'author'
+        assert not any(
+            'users_user' in query['sql'] for query in context.captured_queries)
+        assert Review.objects.get().author == author
+
+    def test_role_change_revokes_token(self, author):
+        client = token_client(author)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        author.role = 'moderator'
+        author.save()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 401
+        assert token_client(author).get(
+            '/api/v1/users/me/').data['role'] == 'moderator'
+
+    def test_rename_keeps_token(self, author):
+        client = token_client(author)
+        response = client.patch('/api/v1/users/me/', {'username': 'renamed'})
+        assert response.status_code == 200
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.data['username'] == 'renamed'
+
+    def test_deleted_user_token_rejected(self, author):
+        client = token_client(author)
+        author.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_object_permission_compares_author_id(self, author):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        other = User.objects.create(
+            username='other', email='other@yamdb.ru', confirmation_code='x')
+        assert token_client(other).patch(
+            url, {'text': 'Чужой'}).status_code == 403
+        assert token_client(author).patch(
+            url, {'text': 'Свой'}).status_code == 200
+
+
+def test_token_revocation_requires_shared_cache(settings, tmp_path):
+    settings.WEB_CONCURRENCY = 3
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'catalog': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.CATALOG_CACHE_ALIAS = 'catalog'
+    with pytest.raises(ImproperlyConfigured, match='токенов'):
+        check_shared_cache()
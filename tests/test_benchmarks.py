@@ -0,0 +1,65 @@
+import pytest
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.concurrency import CONCURRENCY_SCENARIOS, ConcurrencyBenchmark
+from benchmarks.runner import (BenchmarkRunner, compare, load_baseline,
+                               percentile)
+from core.management.commands.benchmark_api import BASELINE
+from reviews.models import Comment, Review, Title, TitleGenre
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([5], 95) == 5
+
+
+@pytest.mark.django_db
+class TestBenchmarks:
+
+    def test_synthetic_catalog_scale(self):
+        catalog = SyntheticCatalog(
+            titles=4, genres_per_title=2, reviews_per_title=3,
+            comments_per_review=2,
+        ).generate()
+        assert Title.objects.count() == 4
+        assert TitleGenre.objects.count() == 8
+        assert Review.objects.count() == 12
+        assert Comment.objects.count() == 24
+        title = Title.objects.get(pk=catalog.first(Title))
+        assert title.rating_count == 3
+
+    def test_query_counts_match_baseline(self):
+        """Число запросов к БД не должно расти относительно baseline.json.
+
+        Задержки на CI не сравниваются: они зависят от машины.
+        """
+        catalog = SyntheticCatalog(titles=12, reviews_per_title=12).generate()
+        results = BenchmarkRunner(catalog, repeat=1).run()
+        assert compare(results, load_baseline(BASELINE)) == []
+
+    def test_compare_reports_regressions(self):
+        baseline = {'scenarios': {
+            'titles-list': {'p95_ms': 10, 'queries': 3}}}
+        results = {'scenarios': {
+            'titles-list': {'p95_ms': 15, 'queries': 13}}}
+        assert len(compare(results, baseline)) == 1
+        assert len(compare(results, baseline, tolerance=0.2)) == 2
+        assert compare(results, baseline, tolerance=1) == [
+            'titles-list: запросов к БД 13 вместо 3']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrency_benchmark_compares_wsgi_and_asgi():
+    catalog = SyntheticCatalog(titles=3, reviews_per_title=2).generate()
+    try:
+        results = ConcurrencyBenchmark(
+            catalog, clients=3, requests=2, workers=1, db_latency=0,
+        ).run()
+    finally:
+        catalog.delete()
+    assert set(results['scenarios']) == set(CONCURRENCY_SCENARIOS)
+    for modes in results['scenarios'].values():
+        assert set(modes) == {'wsgi', 'asgi'}
+        assert all(result['rps'] > 0 for result in modes.values())
+    assert not Title.objects.exists()
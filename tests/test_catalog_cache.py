@@ -0,0 +1,60 @@
+import pytest
+from core.cache import catalog_cache, check_shared_cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+
+    def test_repeated_get_served_from_cache(self, django_assert_num_queries):
+        Category.objects.create(name='Книги', slug='books')
+        client = APIClient()
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'HIT'
+        assert response.data['results'] == [{'name': 'Книги', 'slug': 'books'}]
+        assert catalog_cache.stats(['categories'])['categories'] == {
+            'hits': 1, 'misses': 1}
+
+    def test_unrelated_params_share_key(self):
+        client = APIClient()
+        client.get('/api/v1/titles/', {'year': 2000, 'utm': 'a'})
+        response = client.get('/api/v1/titles/', {'utm': 'b', 'year': 2000})
+        assert response['X-Cache'] == 'HIT'
+        response = client.get('/api/v1/titles/', {'year': 2001})
+        assert response['X-Cache'] == 'MISS'
+
+    def test_writes_invalidate_titles(self):
+        genre = Genre.objects.create(name='Рок', slug='rock')
+        title = Title.objects.create(name='Альбом', year=2000)
+        client = APIClient()
+        url = f'/api/v1/titles/{title.pk}/'
+        client.get(url)
+        title.genre.add(genre)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['genre'] == [{'name': 'Рок', 'slug': 'rock'}]
+
+        author = User.objects.create(username='user', email='u@yamdb.ru')
+        Review.objects.create(title=title, author=author, text='t', score=9)
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['rating'] == 9
+
+        Genre.objects.filter(pk=genre.pk).get().delete()
+        assert client.get(url).data['genre'] == []
+
+
+def test_several_workers_require_shared_cache(settings, tmp_path):
+    settings.WEB_CONCURRENCY = 3
+    with pytest.raises(ImproperlyConfigured):
+        check_shared_cache()
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+    check_shared_cache()
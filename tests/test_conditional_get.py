@@ -0,0 +1,57 @@
+import pytest
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def review():
+    title = Title.objects.create(name='Произведение', year=2000)
+    author = User.objects.create(username='user', email='user@yamdb.ru')
+    return Review.objects.create(
+        title=title, author=author, text='Отзыв', score=7)
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def assert_revalidates(self, url, django_assert_num_queries):
+        client = APIClient()
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert response['Last-Modified']
+        # только выборка версии произведения
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.content
+        return client, etag
+
+    def test_title_detail(self, review, django_assert_num_queries):
+        url = f'/api/v1/titles/{review.title_id}/'
+        client, etag = self.assert_revalidates(url, django_assert_num_queries)
+        category = Category.objects.create(name='Книги', slug='books')
+        Title.objects.filter(pk=review.title_id).update(category=category)
+        category.name = 'Романы'
+        category.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data['category']['name'] == 'Романы'
+
+    def test_reviews_list(self, review, django_assert_num_queries):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        client, etag = self.assert_revalidates(url, django_assert_num_queries)
+        review.text = 'Новый текст'
+        review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_comments_list(self, review, django_assert_num_queries):
+        url = (f'/api/v1/titles/{review.title_id}/reviews/'
+               f'{review.pk}/comments/')
+        client, etag = self.assert_revalidates(url, django_assert_num_queries)
+        Comment.objects.create(review=review, author=review.author, text='К')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert len(response.data['results']) == 1
@@ -0,0 +1,236 @@
+import csv
+import threading
+import time
+
+import pytest
+from core.importer import IdSet, StreamLoadData, model_dependencies
+from core.management.commands import load_data
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre)
+from users.models import User
+
+CSV_DATA = {
+    'genre': [
+        ('id', 'name', 'slug'),
+        (1, 'Драма', 'drama'),
+        (2, 'Драма', 'drama-2'),
+        (3, 'Рок', 'rock'),
+    ],
+    'category': [
+        ('id', 'name', 'slug'),
+        (1, 'Фильм', 'movie'),
+    ],
+    'titles': [
+        ('id', 'name', 'year', 'category'),
+        (1, 'Побег из Шоушенка', 1994, 1),
+        (2, 'Без жанра', 2000, 1),
+        (3, 'Побег из Шоушенка', 1995, 1),
+        (4, 'Неизвестная категория', 2001, 9),
+    ],
+    'genre_title': [
+        ('id', 'title_id', 'genre_id'),
+        (1, 1, 1),
+        (2, 4, 3),
+        (3, 3, 3),
+        (4, 1, 2),
+    ],
+    'users': [
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+        (100, 'admin', 'admin@yamdb.ru', 'admin', '', '', ''),
+        (101, 'user', 'user@yamdb.ru', 'user', '', '', ''),
+        (102, 'bad-role', 'bad@yamdb.ru', 'owner', '', '', ''),
+        (103, 'bad-email', 'not-an-email', 'user', '', '', ''),
+        (104, 'user', 'other@yamdb.ru', 'user', '', '', ''),
+    ],
+    'review': [
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (1, 1, 'Отлично', 100, 10, '2019-09-24T21:08:21.567Z'),
+        (2, 1, 'Повтор', 100, 1, '2019-09-24T21:08:21.567Z'),
+        (3, 1, 'Хорошо', 101, 7, '2019-09-24T21:08:21.567Z'),
+        (4, 2, 'Без жанра', 101, 5, '2019-09-24T21:08:21.567Z'),
+        (5, 4, 'Неизвестный автор', 102, 5, '2019-09-24T21:08:21.567Z'),
+    ],
+    'comments': [
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (1, 1, 'Согласен', 101, '2019-09-24T21:08:21.567Z'),
+        (2, 2, 'К удалённому отзыву', 101, '2019-09-24T21:08:21.567Z'),
+        (3, 3, 'Неизвестный автор', 103, '2019-09-24T21:08:21.567Z'),
+    ],
+}
+
+
+@pytest.fixture
+def path_files(tmp_path):
+    paths = {}
+    for key, rows in CSV_DATA.items():
+        paths[key] = tmp_path / f'{key}.csv'
+        with open(paths[key], 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(rows)
+    return paths
+
+
+class TestIdSet:
+
+    def test_membership(self):
+        ids = IdSet()
+        for value in (0, 7, 8, 1_000_003):
+            ids.add(value)
+        assert all(value in ids for value in (0, 7, 8, 1_000_003))
+        assert not any(value in ids for value in (1, 9, 1_000_004, -1, None))
+
+
+@pytest.mark.django_db
+class TestStreamLoadData:
+
+    def test_stream_load(self, path_files):
+        reports = StreamLoadData(
+            path_files, chunk_size=2, batch_size=2, report=lambda line: None
+        ).run()
+
+        assert set(Genre.objects.values_list('slug', flat=True)) == {
+            'drama', 'rock'}
+        assert dict(Title.objects.values_list('id', 'category_id')) == {
+            1: 1, 4: None}
+        assert set(TitleGenre.objects.values_list('title_id', 'genre_id')) == {
+            (1, 1), (4, 3)}
+        assert set(User.objects.values_list('username', 'is_staff')) == {
+            ('admin', True), ('user', False)}
+        assert set(Review.objects.values_list('id', flat=True)) == {1, 3}
+        assert list(Comment.objects.values_list('id', flat=True)) == [1]
+        assert Title.objects.get(pk=1).rating == 8
+
+        loaded = {report.table: report.loaded for report in reports}
+        assert loaded == {
+            'genre': 2, 'category': 1, 'titles': 2, 'genre_title': 2,
+            'users': 2, 'review': 2, 'comments': 1,
+        }
+
+    def test_incremental_load_touches_only_delta(self, path_files):
+        StreamLoadData(path_files, report=lambda line: None).run()
+        version = Title.objects.get(pk=4).version
+        data = {key: list(rows) for key, rows in CSV_DATA.items()}
+        data['genre'].append((4, 'Джаз', 'jazz'))
+        data['review'][3] = (
+            3, 1, 'Хорошо', 101, 4, '2019-09-24T21:08:21.567Z')
+        del data['comments'][1]
+        for key, rows in data.items():
+            with open(path_files[key], 'w', newline='',
+                      encoding='utf-8') as f:
+                csv.writer(f).writerows(rows)
+
+        reports = StreamLoadData(
+            path_files, incremental=True, report=lambda line: None).run()
+
+        changes = {
+            report.table: (report.created, report.updated)
+            for report in reports
+            if report.created or report.updated
+        }
+        assert changes == {'genre': (1, 0), 'review': (0, 1)}
+        assert Genre.objects.filter(slug='jazz').exists()
+        assert Title.objects.get(pk=1).rating == 7
+        assert Title.objects.get(pk=4).version == version
+        assert Comment.objects.filter(pk=1).exists()
+
+        reports = StreamLoadData(
+            path_files, incremental=True, delete_missing=True,
+            report=lambda line: None,
+        ).run()
+
+        assert not Comment.objects.exists()
+        deleted = {
+            report.table: report.deleted for report in reports
+            if report.deleted
+        }
+        assert deleted == {'comments': 1}
+
+
+@pytest.mark.django_db
+class TestLoadData:
+
+    def test_reviews_inserted_in_batches(self, path_files, monkeypatch):
+        # LoadData ждёт файлы, уже подготовленные через Data
+        with open(path_files['genre_title'], 'w', newline='') as f:
+            csv.writer(f).writerows(CSV_DATA['genre_title'][:-1])
+        with open(path_files['users'], 'w', newline='') as f:
+            csv.writer(f).writerows(
+                [CSV_DATA['users'][0] + ('is_superuser', 'is_staff',
+                                         'is_active')]
+                + [row + (0, 0, 1) for row in CSV_DATA['users'][1:]]
+            )
+        with open(path_files['comments'], 'w', newline='') as f:
+            csv.writer(f).writerows(
+                CSV_DATA['comments'][:2] + CSV_DATA['comments'][3:])
+        monkeypatch.setattr(load_data, 'PATH_FILES', path_files)
+        with CaptureQueriesContext(connection) as context:
+            load_data.LoadData(batch_size=2, ignore_conflicts=True).run()
+        review_inserts = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT OR IGNORE INTO "reviews_review"')
+        ]
+        assert len(review_inserts) == 3
+        # второй отзыв того же автора на то же произведение пропущен
+        assert set(Review.objects.values_list('id', flat=True)) == {
+            1, 3, 4, 5}
+        assert Comment.objects.count() == 2
+
+
+class TestPrepareUsers:
+
+    def test_rejected_users_reported(self, path_files, tmp_path,
+                                     monkeypatch, settings):
+        monkeypatch.setattr(load_data, 'PATH_FILES', path_files)
+        settings.PATH_DATA = tmp_path
+        load_data.Data().run()
+
+        with open(path_files['users'], newline='') as f:
+            users = list(csv.DictReader(f))
+        assert [
+            (user['username'], user['is_staff'], user['is_superuser'],
+             user['is_active'])
+            for user in users
+        ] == [('admin', '1', '0', '1'), ('user', '0', '0', '1')]
+
+        report, = tmp_path.glob('*/users_rejected.csv')
+        with open(report, newline='') as f:
+            rejected = {row['id']: row['reason'] for row in csv.DictReader(f)}
+        assert rejected == {
+            '102': 'role', '103': 'email', '104': 'duplicate username'}
+
+
+class TestParallelLoad:
+
+    def test_dependency_graph(self):
+        graph = model_dependencies(load_data.MODELS)
+        assert graph[Genre] == set()
+        assert graph[User] == set()
+        assert graph[Title] == {Category}
+        assert graph[TitleGenre] == {Title, Genre}
+        assert graph[Review] == {Title, User}
+        assert graph[Comment] == {Review, User}
+
+    def test_tables_start_after_their_parents(self, monkeypatch):
+        events = []
+        lock = threading.Lock()
+
+        def load_table(self, model):
+            with lock:
+                events.append(('start', model))
+            time.sleep(0.01)
+            with lock:
+                events.append(('end', model))
+
+        monkeypatch.setattr(
+            load_data.LoadData, '_LoadData__load_table_in_thread', load_table)
+        load_data.LoadData(workers=3)._LoadData__load_data_parallel()
+
+        position = {event: idx for idx, event in enumerate(events)}
+        for model, parents in model_dependencies(load_data.MODELS).items():
+            for parent in parents:
+                assert position[('end', parent)] < position[('start', model)]
+        # независимые справочники загружаются одновременно
+        first_end = min(
+            idx for idx, (kind, _) in enumerate(events) if kind == 'end')
+        assert first_end == 3
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from core.mail import OutboxWorker, render_queue_metrics
+from core.models import OutboxEmail
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_only_enqueues(self, mailoutbox):
+        response = APIClient().post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.ru'},
+        )
+        assert response.status_code == 200
+        assert mailoutbox == []
+        message = OutboxEmail.objects.get()
+        assert message.to_email == 'newbie@yamdb.ru'
+        assert message.status == OutboxEmail.PENDING
+
+        call_command('send_emails', '--once')
+
+        assert [email.to for email in mailoutbox] == [['newbie@yamdb.ru']]
+        message.refresh_from_db()
+        assert message.status == OutboxEmail.SENT
+        assert message.attempts == 1
+
+    def test_batch_uses_one_connection(self, mailoutbox, monkeypatch):
+        opened = []
+        original_open = EmailBackend.open
+
+        def open_connection(backend):
+            opened.append(backend)
+            return original_open(backend)
+
+        monkeypatch.setattr(EmailBackend, 'open', open_connection)
+        for idx in range(5):
+            OutboxEmail.objects.create(
+                subject='Код', body='123', from_email='noreply@yamdb.ru',
+                to_email=f'user{idx}@yamdb.ru')
+
+        assert OutboxWorker(batch_size=10).run_once() == (5, 0)
+        assert len(opened) == 1
+        assert len(mailoutbox) == 5
+
+    def test_retry_with_backoff(self, monkeypatch, settings):
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 10
+        message = OutboxEmail.objects.create(
+            subject='Код', body='123', from_email='noreply@yamdb.ru',
+            to_email='user@yamdb.ru')
+
+        def fail(backend, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        worker = OutboxWorker(max_attempts=3)
+        delays = []
+        for _ in range(3):
+            OutboxEmail.objects.filter(pk=message.pk).update(
+                next_attempt_at=timezone.now())
+            started = timezone.now()
+            assert worker.run_once() == (0, 1)
+            message.refresh_from_db()
+            delays.append(message.next_attempt_at - started)
+
+        assert delays[0] >= timedelta(seconds=10)
+        assert delays[1] >= timedelta(seconds=20)
+        assert message.status == OutboxEmail.FAILED
+        assert message.attempts == 3
+        assert 'SMTP недоступен' in message.last_error
+        assert worker.run_once() == (0, 0)
+        assert mail.outbox == []
+
+    def test_queue_depth_metrics(self):
+        OutboxEmail.objects.create(
+            subject='Код', body='123', from_email='noreply@yamdb.ru',
+            to_email='user@yamdb.ru',
+            next_attempt_at=timezone.now() + timedelta(hours=1))
+        metrics = render_queue_metrics()
+        assert 'yamdb_email_outbox_messages{status="pending"} 1' in metrics
+        assert 'yamdb_email_outbox_messages{status="failed"} 0' in metrics
+        assert 'yamdb_email_outbox_oldest_pending_seconds' in metrics
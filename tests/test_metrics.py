@@ -0,0 +1,99 @@
+import logging
+
+import pytest
+from core.metrics import registry
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+
+
+@pytest.fixture
+def title():
+    title = Title.objects.create(
+        name='Произведение', year=2000,
+        category=Category.objects.create(name='Фильмы', slug='movie'))
+    title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+    return title
+
+
+@pytest.mark.django_db
+class TestMetricsMiddleware:
+
+    def test_records_view_metrics(self, title):
+        APIClient().get('/api/v1/titles/')
+        APIClient().get(f'/api/v1/titles/{title.pk}/reviews/')
+
+        view = 'TitleViewSet.list'
+        assert registry.value(
+            'yamdb_request_duration_seconds_count', view) == 1
+        assert registry.value('yamdb_db_queries_total', view) == 3
+        assert registry.value(
+            'yamdb_request_duration_seconds_sum', view) >= registry.value(
+                'yamdb_db_query_seconds_total', view) > 0
+        assert registry.value('yamdb_serializer_seconds_total', view) > 0
+        assert registry.value(
+            'yamdb_request_duration_seconds_count', 'ReviewViewSet.list') == 1
+
+    def test_query_budget_warning(self, title, settings, caplog):
+        settings.QUERY_BUDGETS = {'TitleViewSet.list': 1}
+        with caplog.at_level(logging.WARNING, logger='core.metrics'):
+            APIClient().get('/api/v1/titles/')
+        assert 'TitleViewSet.list: 3 запросов к БД' in caplog.text
+        assert registry.value(
+            'yamdb_query_budget_exceeded_total', 'TitleViewSet.list') == 1
+
+    def test_prometheus_endpoint(self, title, settings):
+        client = APIClient()
+        client.get('/api/v1/titles/')
+        response = client.get('/internal/metrics/')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert 'yamdb_db_queries_total{view="TitleViewSet.list"} 3.0' in body
+        assert (
+            'yamdb_request_duration_seconds_count'
+            '{view="TitleViewSet.list"} 1.0'
+        ) in body
+        assert (
+            'yamdb_catalog_cache_requests_total'
+            '{view="titles",outcome="misses"} 1'
+        ) in body
+
+        settings.INTERNAL_IPS = []
+        assert client.get('/internal/metrics/').status_code == 403
+
+        settings.METRICS_TOKEN = 'secret'
+        assert client.get('/internal/metrics/').status_code == 403
+        assert client.get(
+            '/internal/metrics/', HTTP_AUTHORIZATION='Bearer wrong'
+        ).status_code == 403
+        assert client.get(
+            '/internal/metrics/', HTTP_AUTHORIZATION='Bearer secret'
+        ).status_code == 200
+
+
+def test_metrics_are_summed_across_processes(tmp_path, monkeypatch):
+    # Каждый процесс пишет свои файлы; render суммирует их.
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    from prometheus_client import values
+    pid = [1]
+    monkeypatch.setattr(
+        values, 'ValueClass', values.MultiProcessValue(lambda: pid[0]))
+    registry.reset()
+    metrics = type('Metrics', (), {
+        'queries': 2, 'db_time': 0.01, 'serializer_time': 0.0})
+    registry.observe('TitleViewSet.list', 0.02, metrics, False)
+    pid[0] = 2
+    registry.reset()
+    registry.observe('TitleViewSet.list', 0.03, metrics, False)
+    body = registry.render()
+    assert 'yamdb_db_queries_total{view="TitleViewSet.list"} 4.0' in body
+    assert (
+        'yamdb_request_duration_seconds_count'
+        '{view="TitleViewSet.list"} 2.0'
+    ) in body
+    monkeypatch.undo()
+    registry.reset()
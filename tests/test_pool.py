@@ -0,0 +1,153 @@
+import pytest
+from core import pool
+from core.metrics import registry
+from core.pool import (checkout_connections, pool_stats,
+                       release_connections)
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    pool_stats.reset()
+
+
+def opened():
+    return pool_stats.value(
+        'yamdb_db_connections_opened_total', alias='default')
+
+
+def closed(reason):
+    return pool_stats.value(
+        'yamdb_db_connections_closed_total', alias='default', reason=reason)
+
+
+def checkouts():
+    return {
+        kind: pool_stats.value(
+            'yamdb_db_checkouts_total', alias='default', connection=kind)
+        for kind in ('new', 'reused')
+    }
+
+
+def connections(state):
+    return pool_stats.value(
+        'yamdb_db_connections', alias='default', state=state)
+
+
+@pytest.mark.django_db
+class TestConnectionPool:
+
+    def test_request_checks_out_and_releases(self):
+        client = APIClient()
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/genres/')
+        assert checkouts() == {'new': 0, 'reused': 2}
+        assert connections('active') == 0
+        assert pool_stats.value(
+            'yamdb_db_checkout_seconds_bucket', alias='default', le='1.0') == 2
+
+    def test_health_check_replaces_broken_connection(
+            self, monkeypatch, settings):
+        settings.DB_HEALTH_CHECK_IDLE = 0
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        assert APIClient().get('/api/v1/categories/').status_code == 200
+        assert closed('health_check') == 1
+
+    def test_max_age_churn(self, tmp_path, monkeypatch):
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(tmp_path / 'pool.sqlite3'),
+            'CONN_MAX_AGE': 0,
+        }})
+        monkeypatch.setattr(pool, 'connections', handler)
+        for _ in range(2):
+            checkout_connections()
+            handler['default'].ensure_connection()
+            assert connections('active') == 1
+            handler['default'].close_if_unusable_or_obsolete()
+            release_connections()
+        assert opened() == 2
+        assert closed('max_age') == 2
+        assert checkouts() == {'new': 2, 'reused': 0}
+        assert (connections('active'), connections('idle')) == (0, 0)
+
+    def test_persistent_connection_is_reused(self, tmp_path, monkeypatch):
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(tmp_path / 'pool.sqlite3'),
+            'CONN_MAX_AGE': 60,
+        }})
+        monkeypatch.setattr(pool, 'connections', handler)
+        for _ in range(3):
+            checkout_connections()
+            handler['default'].ensure_connection()
+            handler['default'].close_if_unusable_or_obsolete()
+            release_connections()
+        assert opened() == 1
+        assert checkouts() == {'new': 1, 'reused': 2}
+        assert (connections('active'), connections('idle')) == (0, 1)
+        handler['default'].close()
+
+    def test_requests_without_queries_skip_database(
+            self, tmp_path, monkeypatch, settings):
+        settings.DB_HEALTH_CHECK_IDLE = 30
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(tmp_path / 'pool.sqlite3'),
+            'CONN_MAX_AGE': 60,
+        }})
+        monkeypatch.setattr(pool, 'connections', handler)
+        checkout_connections()
+        release_connections()
+        assert opened() == 0
+        checkout_connections()
+        handler['default'].ensure_connection()
+        release_connections()
+        # Только что вернувшееся соединение не проверяется.
+        checks = []
+        monkeypatch.setattr(
+            handler['default'], 'is_usable', lambda: checks.append(1))
+        checkout_connections()
+        release_connections()
+        assert checks == []
+        assert checkouts() == {'new': 1, 'reused': 1}
+        handler['default'].close()
+
+    def test_metrics_endpoint(self, settings):
+        settings.DB_POOL_SIZE = 6
+        body = APIClient().get('/internal/metrics/').content.decode()
+        assert 'yamdb_db_pool_size 6' in body
+        assert (
+            'yamdb_db_connections{alias="default",state="active"} 1.0'
+        ) in body
+        assert (
+            'yamdb_db_checkouts_total{alias="default",connection="reused"} 1.0'
+        ) in body
+
+
+def test_pool_metrics_are_summed_across_processes(tmp_path, monkeypatch):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    from prometheus_client import multiprocess, values
+    pid = [1]
+    monkeypatch.setattr(
+        values, 'ValueClass', values.MultiProcessValue(lambda: pid[0]))
+    for pid[0] in (1, 2):
+        pool_stats.reset()
+        pool_stats.opened('default')
+        pool_stats.checkout('default', 0.001, False)
+    body = registry.render()
+    assert (
+        'yamdb_db_checkouts_total{alias="default",connection="new"} 2.0'
+    ) in body
+    assert 'yamdb_db_connections{alias="default",state="active"} 2.0' in body
+    # Активные соединения завершившегося воркера из суммы уходят.
+    multiprocess.mark_process_dead(1, str(tmp_path))
+    body = registry.render()
+    assert 'yamdb_db_connections{alias="default",state="active"} 1.0' in body
+    assert (
+        'yamdb_db_connections_opened_total{alias="default"} 2.0'
+    ) in body
+    monkeypatch.undo()
+    pool_stats.reset()
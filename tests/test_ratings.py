@@ -0,0 +1,78 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def title():
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+@pytest.fixture
+def authors():
+    return [
+        User.objects.create(username=f'user{idx}', email=f'u{idx}@yamdb.ru')
+        for idx in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_review_writes(self, title, authors):
+        first = Review.objects.create(
+            title=title, author=authors[0], text='a', score=10)
+        Review.objects.create(
+            title=title, author=authors[1], text='b', score=5)
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            15, 2, 7)
+
+        first = Review.objects.get(pk=first.pk)
+        first.score = 1
+        first.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            6, 2, 3)
+
+        first.delete()
+        Review.objects.filter(author=authors[1]).delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            0, 0, None)
+
+    def test_save_keeps_rating_written_by_reviews(self, title, authors):
+        stale = Title.objects.get(pk=title.pk)
+        Review.objects.create(
+            title=title, author=authors[0], text='a', score=10)
+        stale.name = 'Новое название'
+        stale.save()
+        assert (stale.rating_sum, stale.rating_count, stale.rating) == (
+            10, 1, 10)
+        title.refresh_from_db()
+        assert title.name == 'Новое название'
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            10, 1, 10)
+
+    def test_save_bumps_version_in_database(self, title):
+        stale = Title.objects.get(pk=title.pk)
+        Title.objects.filter(pk=title.pk).touch()
+        stale.save()
+        assert stale.version == 3
+        title.save(update_fields=['name'])
+        assert title.version == 4
+        assert Title.objects.get(pk=title.pk).version == 4
+
+    def test_rebuild_ratings_fixes_drift(self, title, authors):
+        Review.objects.bulk_create([
+            Review(title=title, author=author, text='t', score=8)
+            for author in authors
+        ])
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', '--check')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            24, 3, 8)
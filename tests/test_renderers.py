@@ -0,0 +1,98 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from api.v1 import parsers, renderers
+from api.v1.parsers import FastJSONParser
+from api.v1.renderers import FastJSONRenderer
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.rendering import RenderingBenchmark
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Title
+
+PAYLOAD = {
+    'text': 'Отзыв\u2028с переводом строки',
+    'detail': gettext_lazy('Not found.'),
+    'errors': [ErrorDetail('Обязательное поле.', code='required')],
+    'pub_date': datetime.datetime(
+        2023, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2023, 1, 2),
+    'score': Decimal('7.5'),
+    'rating': None,
+    1: 'ключ-число',
+}
+
+
+@pytest.fixture(params=('orjson', 'stdlib'))
+def json_backend(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+    elif renderers.orjson is None:
+        pytest.skip('orjson не установлен')
+    return request.param
+
+
+class TestFastJSON:
+
+    def test_render_matches_drf(self, json_backend):
+        rendered = FastJSONRenderer().render(PAYLOAD)
+        assert json.loads(rendered) == json.loads(
+            JSONRenderer().render(PAYLOAD))
+        assert 'Отзыв'.encode() in rendered
+        assert b'\\u2028' in rendered
+
+    def test_indent_falls_back_to_json(self, json_backend):
+        rendered = FastJSONRenderer().render(
+            {'name': 'Жанр'}, 'application/json; indent=2')
+        assert rendered == b'{\n  "name": "\xd0\x96\xd0\xb0\xd0\xbd\xd1\x80"\n}'
+
+    def test_parse(self, json_backend):
+        body = json.dumps({'text': 'Отзыв', 'score': 7}, ensure_ascii=False)
+        assert FastJSONParser().parse(io.BytesIO(body.encode())) == {
+            'text': 'Отзыв', 'score': 7}
+
+    @pytest.mark.parametrize('body', (b'{"score": ', b'{"score": NaN}'))
+    def test_parse_errors(self, json_backend, body):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.django_db
+class TestJSONContract:
+
+    def test_review_roundtrip(self, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        user = django_user_model.objects.create(
+            username='reader', email='reader@yamdb.ru')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.post(
+            url, json.dumps({'text': 'Прекрасно', 'score': 9},
+                            ensure_ascii=False).encode(),
+            content_type='application/json')
+        assert response.status_code == 201
+        assert response['Content-Type'] == 'application/json'
+        review = json.loads(response.content)
+        assert review['text'] == 'Прекрасно'
+        assert review['title'] == 'Произведение'
+        pub_date = datetime.datetime.fromisoformat(
+            review['pub_date'].replace('Z', '+00:00'))
+        assert abs(pub_date - timezone.now()) < datetime.timedelta(minutes=1)
+
+    def test_rendering_benchmark(self):
+        catalog = SyntheticCatalog(titles=3, reviews_per_title=2).generate()
+        results = RenderingBenchmark(
+            catalog, page=5, repeat=2, text_length=100).run()
+        assert set(results['payloads']) == {'reviews', 'titles'}
+        reviews = results['payloads']['reviews']
+        assert reviews['bytes'] > 0
+        assert set(reviews) >= {
+            'render_stdlib', 'render_orjson', 'parse_stdlib', 'parse_orjson'}
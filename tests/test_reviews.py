@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def title_with_reviews():
+    title = Title.objects.create(name='Произведение', year=2000)
+    now = timezone.now()
+    for idx in range(12):
+        author = User.objects.create(
+            username=f'user{idx}', email=f'user{idx}@yamdb.ru')
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {idx}', score=5)
+        # несколько отзывов с одинаковой датой проверяют разбор по id
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=now - timedelta(minutes=idx // 3))
+    return title
+
+
+@pytest.mark.django_db
+class TestReviewFeedPagination:
+
+    def url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_cursor_pages_cover_feed_in_order(self, title_with_reviews):
+        client = APIClient()
+        response = client.get(
+            self.url(title_with_reviews), {'cursor': '', 'limit': 5})
+        assert response.status_code == 200
+        ids = [review['id'] for review in response.data['results']]
+        while response.data['next']:
+            response = client.get(response.data['next'])
+            ids += [review['id'] for review in response.data['results']]
+        expected = list(Review.objects.filter(
+            title=title_with_reviews
+        ).order_by('-pub_date', '-id').values_list('id', flat=True))
+        assert ids == expected
+
+    def test_limit_offset_still_supported(self, title_with_reviews):
+        client = APIClient()
+        response = client.get(
+            self.url(title_with_reviews), {'limit': 5, 'offset': 10})
+        assert response.status_code == 200
+        assert response.data['count'] == 12
+        assert len(response.data['results']) == 2
+
+
+@pytest.mark.django_db
+class TestFeedQueryCount:
+
+    @pytest.mark.parametrize('limit', (1, 5, 12))
+    def test_review_page_query_count(self, title_with_reviews,
+                                     django_assert_num_queries, limit):
+        client = APIClient()
+        # произведение (и его версия) + count + страница
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title_with_reviews.id}/reviews/',
+                {'limit': limit},
+            )
+        assert response.status_code == 200
+        assert len(response.data['results']) == limit
+        assert response.data['results'][0]['title'] == 'Произведение'
+
+    @pytest.mark.parametrize('limit', (1, 5, 12))
+    def test_comment_page_query_count(self, title_with_reviews,
+                                      django_assert_num_queries, limit):
+        review = Review.objects.filter(title=title_with_reviews).first()
+        for author in User.objects.all():
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий')
+        client = APIClient()
+        # отзыв с произведением + count + страница
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title_with_reviews.id}/reviews/'
+                f'{review.id}/comments/',
+                {'limit': limit},
+            )
+        assert response.status_code == 200
+        assert len(response.data['results']) == limit
+        assert response.data['results'][0]['review'] == review.text
+
+
+@pytest.mark.django_db
+class TestReviewWrite:
+
+    @pytest.fixture
+    def client(self):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create(username='author', email='author@yamdb.ru'))
+        return client
+
+    def test_review_create_loads_title_once(self, client,
+                                            django_assert_num_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        # произведение + SAVEPOINT, INSERT, сдвиг рейтинга, RELEASE
+        with django_assert_num_queries(5):
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отлично', 'score': 9},
+            )
+        assert response.status_code == 201
+        assert response.data['title'] == 'Произведение'
+
+    def test_second_review_rejected_by_constraint(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert client.post(url, {'text': 'a', 'score': 9}).status_code == 201
+        response = client.post(url, {'text': 'b', 'score': 1})
+        assert response.status_code == 400
+        assert response.data['non_field_errors'] == [
+            'Вы уже оставили отзыв на это произведение']
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating) == (1, 9)
+
+    def test_comment_requires_review_of_title(self, client,
+                                              django_assert_num_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        other = Title.objects.create(name='Другое', year=2000)
+        review = Review.objects.create(
+            title=title, author=User.objects.get(), text='Отзыв', score=5)
+        response = client.post(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            {'text': 'Комментарий'},
+        )
+        assert response.status_code == 404
+        # отзыв с произведением + INSERT + обновление версии произведения
+        with django_assert_num_queries(3):
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+                {'text': 'Комментарий'},
+            )
+        assert response.status_code == 201
@@ -0,0 +1,106 @@
+import pytest
+from core.cache import check_shared_cache
+from core.routing import replica_pool
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+from users.authentication import issue_access_token
+from users.models import User
+
+REPLICA_DB = ['default', 'replica']
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    replica_pool.reset()
+    yield 'replica'
+    replica_pool.reset()
+
+
+@pytest.fixture
+def title():
+    # На реплике то же произведение, но без отзывов: по числу отзывов в
+    # ответе видно, из какой базы шло чтение.
+    Title.objects.using('replica').create(id=1, name='Реплика', year=2000)
+    return Title.objects.create(id=1, name='Основная', year=2000)
+
+
+def auth_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {issue_access_token(user)}')
+    return client
+
+
+def review_count(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+    assert response.status_code == 200
+    return len(response.data['results'])
+
+
+@pytest.mark.django_db(databases=REPLICA_DB)
+class TestReplicaRouting:
+
+    def test_reads_primary_without_replicas(self, title):
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.create(title=title, author=author, text='Да', score=7)
+        assert review_count(APIClient(), title) == 1
+
+    def test_safe_requests_read_replica(self, replica, title):
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.create(title=title, author=author, text='Да', score=7)
+        assert review_count(APIClient(), title) == 0
+        response = APIClient().get(f'/api/v1/titles/{title.id}/')
+        # Промах кэша каталога заполняется из основной базы.
+        assert response.data['name'] == 'Основная'
+
+    def test_writes_go_to_primary_and_stick(self, replica, title):
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        client = auth_client(author)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Да', 'score': 7})
+        assert response.status_code == 201
+        assert Review.objects.using('replica').count() == 0
+        assert review_count(client, title) == 1
+        other = User.objects.create(username='other', email='o@yamdb.ru')
+        assert review_count(auth_client(other), title) == 0
+
+    def test_stickiness_expires(self, replica, title, settings):
+        settings.DATABASE_REPLICA_STICKY_SECONDS = 0
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        client = auth_client(author)
+        client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Да', 'score': 7})
+        assert review_count(client, title) == 0
+
+    @pytest.mark.parametrize('lag', [60, None])
+    def test_lagging_replica_falls_back(
+            self, replica, title, monkeypatch, lag):
+        monkeypatch.setattr(replica_pool, 'measure_lag', lambda alias: lag)
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.create(title=title, author=author, text='Да', score=7)
+        assert review_count(APIClient(), title) == 1
+
+    def test_lag_is_rechecked_after_interval(
+            self, replica, title, monkeypatch, settings):
+        lags = [60, 0]
+        monkeypatch.setattr(
+            replica_pool, 'measure_lag', lambda alias: lags.pop(0))
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.create(title=title, author=author, text='Да', score=7)
+        assert review_count(APIClient(), title) == 1
+        settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 0
+        assert review_count(APIClient(), title) == 0
+
+
+def test_replicas_require_shared_cache(settings, tmp_path):
+    check_shared_cache()
+    settings.DATABASE_REPLICAS = ['replica']
+    with pytest.raises(ImproperlyConfigured):
+        check_shared_cache()
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+    check_shared_cache()
@@ -0,0 +1,72 @@
+import os
+import runpy
+
+import pytest
+from benchmarks.startup import StartupBenchmark
+from core.server import ProfileError, server_options
+from core.warmup import warm_up
+
+from .conftest import root_dir
+
+GUNICORN_CONF = os.path.join(root_dir, 'api_yamdb', 'gunicorn.conf.py')
+
+
+class TestServerProfiles:
+
+    def test_workers_follow_cpu_count(self):
+        options = server_options('production', cpus=4, environ={})
+        assert options['worker_class'] == 'sync'
+        assert options['workers'] == 9
+        assert options['threads'] == 1
+        assert options['preload_app'] is True
+        threaded = server_options('threaded', cpus=4, environ={})
+        assert (threaded['workers'], threaded['threads']) == (5, 4)
+        asynchronous = server_options('async', cpus=4, environ={})
+        assert (asynchronous['workers'], asynchronous['threads']) == (4, 4)
+
+    def test_development_does_not_preload(self):
+        options = server_options('development', cpus=8, environ={})
+        assert options['workers'] == 1
+        assert options['preload_app'] is False
+
+    def test_environment_overrides_profile(self):
+        options = server_options(cpus=4, environ={
+            'GUNICORN_PROFILE': 'production',
+            'WEB_CONCURRENCY': '3',
+            'GUNICORN_THREADS': '2',
+        })
+        assert options['workers'] == 3
+        assert options['threads'] == 2
+        assert options['worker_class'] == 'gthread'
+
+    def test_unknown_profile(self):
+        with pytest.raises(ProfileError):
+            server_options('fast', cpus=1, environ={})
+
+    def test_config_exports_pool_size(self, monkeypatch, tmp_path):
+        monkeypatch.setenv('GUNICORN_PROFILE', 'threaded')
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        monkeypatch.setenv('WEB_CONCURRENCY', '2')
+        monkeypatch.delenv('GUNICORN_THREADS', raising=False)
+        config = runpy.run_path(GUNICORN_CONF)
+        assert config['worker_class'] == 'gthread'
+        assert config['preload_app'] is True
+        assert os.environ['GUNICORN_THREADS'] == '4'
+
+
+@pytest.mark.django_db
+def test_warm_up_does_not_touch_database(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        timings = warm_up()
+    assert set(timings) == {'urls', 'serializers', 'filters', 'drf'}
+
+
+def test_startup_benchmark_compares_cold_and_warm():
+    environ = dict(
+        os.environ, ENGINE='django.db.backends.sqlite3', DB_NAME=':memory:')
+    results = StartupBenchmark(
+        repeat=1, paths=['/api/schema/'], environ=environ).run()
+    assert set(results['modes']) == {'cold', 'warm'}
+    assert results['modes']['cold']['warm_up_ms'] == 0
+    assert results['modes']['warm']['warm_up_ms'] > 0
+    assert '/api/schema/' in results['modes']['warm']['paths']
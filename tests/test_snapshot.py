@@ -0,0 +1,60 @@
+import pytest
+from core.snapshot import (SNAPSHOT_MODELS, SnapshotError, SnapshotReader,
+                           SnapshotWriter, dependency_order)
+from django.core.management import call_command
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def catalog():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(
+        name='Побег из Шоушенка', year=1994, category=category)
+    title.genre.add(genre)
+    Title.objects.create(name='Без описания', year=2000, description='')
+    author = User.objects.create(
+        username='author', email='author@yamdb.ru', bio='Строка, "кавычки"')
+    review = Review.objects.create(
+        title=title, author=author, text='Отлично', score=9)
+    Comment.objects.create(review=review, author=author, text='Согласен')
+    return title
+
+
+def table_rows():
+    return {
+        model: sorted(model.objects.values_list())
+        for model in SNAPSHOT_MODELS
+    }
+
+
+@pytest.mark.django_db
+class TestSnapshot:
+
+    def test_dependency_order(self):
+        order = dependency_order(list(SNAPSHOT_MODELS))
+        assert order.index(Title) > order.index(Category)
+        assert order.index(Review) > order.index(User)
+        assert order.index(Comment) > order.index(Review)
+
+    def test_round_trip(self, catalog, tmp_path):
+        call_command('dump_snapshot', str(tmp_path))
+        expected = table_rows()
+        Title.objects.all().delete()
+        User.objects.all().delete()
+
+        call_command('load_snapshot', str(tmp_path))
+
+        assert table_rows() == expected
+        assert Title.objects.get(name='Без описания').description == ''
+        assert Title.objects.get(pk=catalog.pk).description is None
+        assert Title.objects.get(pk=catalog.pk).rating == 9
+
+    def test_checksum_mismatch_keeps_data(self, catalog, tmp_path):
+        manifest = SnapshotWriter(tmp_path).run()
+        (tmp_path / manifest['tables'][0]['file']).write_bytes(b'broken')
+
+        with pytest.raises(SnapshotError):
+            SnapshotReader(tmp_path).run()
+        assert Title.objects.count() == 2
@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+
+import pytest
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title, TitleGenre
+from users.models import User
+
+
+@pytest.fixture
+def titles_catalog():
+    category = Category.objects.create(name='Фильмы', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    for idx in range(30):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category)
+        for genre in genres:
+            TitleGenre.objects.create(title=title, genre=genre)
+    return category, genres
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create(
+        username='admin', email='admin@yamdb.ru', role='admin'))
+    return client
+
+
+@pytest.mark.django_db
+class TestTitleList:
+    url = '/api/v1/titles/'
+
+    @pytest.mark.parametrize('limit', (1, 10, 30))
+    def test_list_query_count_does_not_depend_on_page_size(
+            self, titles_catalog, django_assert_num_queries, limit):
+        client = APIClient()
+        # count + страница + жанры страницы
+        with django_assert_num_queries(3):
+            response = client.get(self.url, {'limit': limit})
+        assert response.status_code == 200
+        assert len(response.data['results']) == limit
+        assert response.data['count'] == 30
+
+    def test_list_serializes_only_page(self, titles_catalog):
+        client = APIClient()
+        response = client.get(self.url, {'limit': 2, 'offset': 28})
+        assert response.status_code == 200
+        assert len(response.data['results']) == 2
+        title = response.data['results'][0]
+        assert title['category'] == {'name': 'Фильмы', 'slug': 'movie'}
+        assert len(title['genre']) == 3
+        assert title['rating'] is None
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def catalog(self):
+        rock = Genre.objects.create(name='Рок', slug='rock')
+        punk_rock = Genre.objects.create(name='Панк-рок', slug='punk-rock')
+        books = Category.objects.create(name='Книги', slug='books')
+        music = Category.objects.create(name='Музыка', slug='music')
+        titles = {}
+        for name, year, category, genre in (
+            ('Ring of Fire', 1963, music, rock),
+            ('The Ring', 1954, books, None),
+            ('Ring', 2002, music, punk_rock),
+        ):
+            titles[name] = Title.objects.create(
+                name=name, year=year, category=category)
+            if genre:
+                titles[name].genre.add(genre)
+        return titles
+
+    def names(self, **params):
+        response = APIClient().get(self.url, params)
+        assert response.status_code == 200
+        return [title['name'] for title in response.data['results']]
+
+    def test_exact_slug_and_year(self, catalog):
+        assert self.names(genre='rock') == ['Ring of Fire']
+        assert self.names(category='music', year=2002) == ['Ring']
+        assert self.names(year=19) == []
+
+    def test_search_is_ranked(self, catalog):
+        assert self.names(search='ring') == [
+            'Ring', 'Ring of Fire', 'The Ring']
+
+
+@pytest.mark.django_db
+class TestTitleExport:
+    url = '/api/v1/titles/export/'
+
+    def test_export_is_admin_only(self, titles_catalog):
+        client = APIClient()
+        assert client.get(self.url).status_code == 401
+        client.force_authenticate(
+            User.objects.create(username='user', email='user@yamdb.ru'))
+        assert client.get(self.url).status_code == 403
+
+    def test_ndjson_export(self, titles_catalog, admin_client,
+                           django_assert_num_queries, monkeypatch):
+        monkeypatch.setattr('api.v1.views.TitleViewSet.export_chunk_size', 7)
+        response = admin_client.get(self.url)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        # Порции по 7 произведений: 5 порций, в каждой запрос жанров;
+        # справочники загружаются один раз.
+        with django_assert_num_queries(1 + 5 + 2):
+            content = b''.join(response.streaming_content)
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        assert [row['id'] for row in rows] == list(
+            Title.objects.order_by('pk').values_list('pk', flat=True))
+        assert rows[0]['category'] == {'name': 'Фильмы', 'slug': 'movie'}
+        assert [genre['slug'] for genre in rows[0]['genre']] == [
+            'genre-0', 'genre-1', 'genre-2']
+
+    def test_export_skips_deleted_genres(self, titles_catalog, admin_client):
+        _, genres = titles_catalog
+        genres[0].delete()
+        response = admin_client.get(self.url)
+        assert response.status_code == 200
+        content = b''.join(response.streaming_content)
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        assert len(rows) == 30
+        assert [genre['slug'] for genre in rows[0]['genre']] == [
+            'genre-1', 'genre-2']
+
+    def test_csv_export_uses_title_filter(self, titles_catalog, admin_client):
+        Title.objects.create(name='Другое', year=1990)
+        response = admin_client.get(
+            self.url, {'format': 'csv', 'year': 1990})
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert len(rows) == 1
+        assert rows[0]['name'] == 'Другое'
+        assert rows[0]['genre'] == ''
+        assert rows[0]['category'] == ''
+
+
+@pytest.mark.django_db
+class TestTitleBulkCreate:
+    url = '/api/v1/titles/bulk/'
+
+    @pytest.fixture
+    def catalog(self):
+        Category.objects.create(name='Фильмы', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Рок', slug='rock')
+
+    def test_bulk_create(self, catalog, admin_client):
+        response = admin_client.post(self.url, [
+            {'name': 'Первое', 'year': 1994, 'category': 'movie',
+             'genre': ['drama', 'rock']},
+            {'name': 'Второе', 'year': 2000, 'category': 'movie',
+             'genre': ['rock', 'rock']},
+        ], format='json')
+        assert response.status_code == 201
+        assert [(title['name'], title['genre']) for title in response.data] == [
+            ('Первое', ['drama', 'rock']), ('Второе', ['rock'])]
+        assert TitleGenre.objects.count() == 3
+        assert Title.objects.get(
+            pk=response.data[1]['id']).category.slug == 'movie'
+
+    def test_per_item_errors(self, catalog, admin_client):
+        response = admin_client.post(self.url, [
+            {'name': 'Верное', 'year': 1994, 'category': 'movie',
+             'genre': ['drama']},
+            {'name': 'Без жанра', 'year': 2000, 'category': 'books',
+             'genre': ['drama', 'jazz']},
+        ], format='json')
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert set(response.data[1]) == {'category', 'genre'}
+        assert 'jazz' in str(response.data[1]['genre'][0])
+        assert not Title.objects.exists()
+
+    def test_bulk_create_is_admin_only(self, catalog):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create(username='user', email='user@yamdb.ru'))
+        response = client.post(self.url, [], format='json')
+        assert response.status_code == 403